@@ -1,27 +1,286 @@
 import os
-from flask import Flask, request, render_template, jsonify, send_file
+import io
+import queue
+import zipfile
+from flask import Flask, Request, Response, request, render_template, jsonify, send_file
+from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
-from pdf_extractor import extract_text_from_pdf
-from grant_identifier import identify_potential_grants, add_to_database
+from pdf_extractor import PageOcr, count_pdf_pages, iter_pdf_pages, needs_ocr, ocr_available, ocr_rows
+from grant_identifier import add_to_database, identify_potential_grants_budgeted, known_grants, serialize_result
+from result_cache import ResultCache, PageCache, OcrCache
+from incremental import analyze_document_incremental
+from portfolio import aggregate_results, validate_result
+from jobs import JobQueue, BackgroundWriter, SharedJobStore, DONE, FAILED
+from metrics import DOCUMENT_BYTES, observe_stage, profiling, render_metrics, timed
 import json
+import time
 from datetime import datetime
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Limits of /batch: the whole request, and the documents in it (each document,
+# including each PDF inside a ZIP, is still held to MAX_CONTENT_LENGTH)
+app.config['BATCH_MAX_CONTENT_LENGTH'] = int(os.environ.get('BATCH_MAX_CONTENT_LENGTH', str(256 * 1024 * 1024)))
+app.config['BATCH_MAX_DOCUMENTS'] = int(os.environ.get('BATCH_MAX_DOCUMENTS', '200'))
+
+class InMemoryUploadRequest(Request):
+    """
+    Request that keeps uploaded files in memory instead of a temporary file.
+    
+    Werkzeug spools every upload body over 500KB to a temporary file, so a
+    PDF would be written to disk and read back before it is analyzed.
+    Bodies up to MAX_CONTENT_LENGTH are parsed into memory instead; larger
+    /batch bodies are still spooled, so a batch never sits in memory whole.
+    """
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= app.config['MAX_CONTENT_LENGTH']:
+            return io.BytesIO()
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+app.request_class = InMemoryUploadRequest
+# Processes used to extract PDF pages; 1 extracts inside the request worker.
+# Budgeted uploads always extract serially, one page at a time.
+app.config['PDF_EXTRACT_WORKERS'] = int(os.environ.get('PDF_EXTRACT_WORKERS', '1'))
+
+# Content-addressed cache of extracted text and results for repeat uploads
+app.config['RESULT_CACHE_DIR'] = os.environ.get('RESULT_CACHE_DIR', 'cache')
+app.config['RESULT_CACHE_MAX_BYTES'] = int(os.environ.get('RESULT_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+# Per-page partial results, so amended documents only re-extract changed pages
+app.config['PAGE_CACHE_DIR'] = os.environ.get('PAGE_CACHE_DIR', os.path.join(app.config['RESULT_CACHE_DIR'], 'pages'))
+app.config['PAGE_CACHE_MAX_BYTES'] = int(os.environ.get('PAGE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Processes that OCR scanned pages (pages without a text layer); 0 disables OCR
+app.config['OCR_WORKERS'] = int(os.environ.get('OCR_WORKERS', '2'))
+app.config['OCR_LANGUAGE'] = os.environ.get('OCR_LANGUAGE', 'eng')
+# OCR text per page, so a scanned page is only OCRed once
+app.config['OCR_CACHE_DIR'] = os.environ.get('OCR_CACHE_DIR', os.path.join(app.config['RESULT_CACHE_DIR'], 'ocr'))
+app.config['OCR_CACHE_MAX_BYTES'] = int(os.environ.get('OCR_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# Background threads that run upload jobs
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', '4'))
+# Documents of a /batch request read and queued at once; the rest of the
+# request is only read as these finish
+app.config['BATCH_MAX_IN_FLIGHT'] = int(os.environ.get('BATCH_MAX_IN_FLIGHT', str(2 * app.config['JOB_WORKERS'])))
+# SQLite file through which the processes of a multi-worker server share job
+# status and results (see serve.py); unset keeps jobs in this process only
+app.config['JOB_DB_PATH'] = os.environ.get('JOB_DB_PATH')
+# Finished jobs keep their results, extracted text included, for polling;
+# the oldest are forgotten once the results add up to this many bytes
+app.config['JOB_RESULT_MAX_BYTES'] = int(os.environ.get('JOB_RESULT_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Characters of extracted text returned per page by /jobs/<id>/text
+app.config['TEXT_PAGE_CHARS'] = int(os.environ.get('TEXT_PAGE_CHARS', str(64 * 1024)))
+
+# Whether uploads and their extracted text are kept in UPLOAD_FOLDER. Uploads
+# are always processed from memory; when kept, the files are written by a
+# background writer so no request waits on the disk.
+app.config['PERSIST_UPLOADS'] = os.environ.get('PERSIST_UPLOADS', '1') == '1'
+
+# Default analysis budget for /upload; each can be overridden per request with
+# ?max_pages=&max_ms=&target_confidence=. Unset analyzes every page in full.
+def _env_number(name, kind):
+    value = os.environ.get(name)
+    return kind(value) if value else None
+
+app.config['ANALYSIS_MAX_PAGES'] = _env_number('ANALYSIS_MAX_PAGES', int)
+app.config['ANALYSIS_MAX_MS'] = _env_number('ANALYSIS_MAX_MS', int)
+app.config['ANALYSIS_TARGET_CONFIDENCE'] = _env_number('ANALYSIS_TARGET_CONFIDENCE', float)
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+result_cache = ResultCache(app.config['RESULT_CACHE_DIR'], app.config['RESULT_CACHE_MAX_BYTES'])
+page_cache = PageCache(app.config['PAGE_CACHE_DIR'], app.config['PAGE_CACHE_MAX_BYTES'])
+page_ocr = PageOcr(
+    workers=app.config['OCR_WORKERS'],
+    cache=OcrCache(app.config['OCR_CACHE_DIR'], app.config['OCR_CACHE_MAX_BYTES']),
+    language=app.config['OCR_LANGUAGE']
+) if app.config['OCR_WORKERS'] > 0 else None
+job_store = SharedJobStore(
+    app.config['JOB_DB_PATH'], max_result_bytes=app.config['JOB_RESULT_MAX_BYTES']
+) if app.config['JOB_DB_PATH'] else None
+job_queue = JobQueue(app.config['JOB_WORKERS'], store=job_store, max_result_bytes=app.config['JOB_RESULT_MAX_BYTES'])
+file_writer = BackgroundWriter()
+
 ALLOWED_EXTENSIONS = {'pdf'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def process_upload(job, filename, data, profile=None, budget=None):
+    """
+    Extract and analyze an upload in memory, reporting progress on the job.
+    
+    Args:
+        job (Job): The job to report progress on
+        filename (str): Secure name of the uploaded file
+        data (bytes): Contents of the upload
+        profile (dict): Stage timings already taken for this upload; when
+            given, the response includes a breakdown of every stage
+        budget (dict): Optional 'max_pages', 'max_ms' and 'target_confidence'
+            limits; analysis stops early once one is reached
+        
+    Returns:
+        dict: The /upload response body
+    """
+    queue_wait = time.time() - job.created_at
+    if profile is None:
+        observe_stage('queue_wait', queue_wait)
+        return _process_upload(job, filename, data, budget)
+    
+    with profiling() as stages:
+        stages.update(profile)
+        observe_stage('queue_wait', queue_wait)
+        response = _process_upload(job, filename, data, budget)
+    response['profile'] = {'stages': {stage: round(seconds, 6) for stage, seconds in stages.items()}}
+    return response
+
+def _process_upload(job, filename, data, budget=None):
+    """Extract and analyze an upload in memory; see process_upload."""
+    # Repeat uploads of the same document skip extraction and analysis, until
+    # a grant is saved: results depend on the saved grants too
+    known_grants.refresh()
+    cache_key = result_cache.key_for(data, known_grants.generation)
+    with timed('cache_lookup'):
+        cached = result_cache.get(cache_key)
+    truncated = None
+    if cached:
+        # A full result serves any budget
+        extracted_text = cached['text']
+        result = cached['result']
+        job.complete_stage('cache')
+    elif budget:
+        extracted_text, result, truncated = _analyze_budgeted(job, data, budget)
+        # Pages analyzed before the budget ran out may hold no text, while later ones might
+        if not extracted_text and truncated is None:
+            raise _no_text_error()
+        job.complete_stage('analyze')
+        if truncated is None:
+            with timed('cache_store'):
+                result_cache.put(cache_key, extracted_text, result)
+    else:
+        try:
+            with timed('count_pages'):
+                total_pages = count_pdf_pages(data)
+            job.update_progress(total_pages=total_pages, pages_extracted=0)
+        except Exception:
+            pass
+        
+        # Extract text and budget table rows from the PDF and identify potential
+        # grants; pages unchanged since an earlier version come from page_cache
+        extracted_text, result, pages_reused = analyze_document_incremental(
+            data,
+            page_cache,
+            workers=app.config['PDF_EXTRACT_WORKERS'],
+            progress=lambda pages: job.update_progress(pages_extracted=pages),
+            ocr=page_ocr
+        )
+        if not extracted_text:
+            raise _no_text_error()
+        job.update_progress(pages_reused=pages_reused)
+        job.complete_stage('extract')
+        result = serialize_result(result)
+        job.complete_stage('analyze')
+        with timed('cache_store'):
+            result_cache.put(cache_key, extracted_text, result)
+    
+    # Save extracted text to a file, or serve the download from the job
+    output_filename = os.path.splitext(filename)[0] + "_extracted.txt"
+    if app.config['PERSIST_UPLOADS']:
+        with timed('save_text'):
+            file_writer.write(os.path.join(app.config['UPLOAD_FOLDER'], output_filename), extracted_text)
+        download_url = f'/download/{output_filename}'
+    else:
+        download_url = f'/jobs/{job.id}/download/{output_filename}'
+    DOCUMENT_BYTES.observe('extracted_text', len(extracted_text.encode('utf-8')))
+    job.complete_stage('save')
+    
+    return {
+        'success': True,
+        'text': extracted_text,
+        'download_url': download_url,
+        'grants': result['grants'],
+        'dates': result['dates'],
+        'financial': result['financial'],
+        'project': result['project'],
+        'truncated': truncated
+    }
+
+def _no_text_error():
+    """Build the error for a PDF that yielded no text, saying whether OCR could have helped."""
+    if page_ocr is None or not ocr_available():
+        return RuntimeError('Failed to extract text from PDF; it may be scanned, and OCR is not available')
+    return RuntimeError('Failed to extract text from PDF')
+
+def _analyze_budgeted(job, data, budget):
+    """
+    Extract and analyze an upload page by page until its budget runs out.
+    
+    Returns:
+        tuple: (text, result, truncated) with the text of the analyzed pages,
+        the JSON-ready result, and identify_potential_grants_budgeted's
+        truncation report
+    """
+    try:
+        with timed('count_pages'):
+            total_pages = count_pdf_pages(data)
+        job.update_progress(total_pages=total_pages, pages_extracted=0)
+    except Exception:
+        total_pages = None
+    
+    # Pages are extracted lazily and serially, so pages past the budget are
+    # never read; a process pool would extract whole page ranges ahead and
+    # hold back the first page until its range was done
+    page_iter = iter_pdf_pages(data, layout=True)
+    texts = []
+    def pages():
+        for page_text, rows in page_iter:
+            if page_ocr is not None and needs_ocr(page_text):
+                recognized = page_ocr.recognize(data, [len(texts)]).get(len(texts))
+                if recognized:
+                    page_text, rows = recognized, ocr_rows(recognized)
+            texts.append(page_text)
+            job.update_progress(pages_extracted=len(texts))
+            yield page_text, rows
+    
+    max_ms = budget.get('max_ms')
+    with timed('budgeted_analysis'):
+        result, truncated = identify_potential_grants_budgeted(
+            pages(),
+            max_pages=budget.get('max_pages'),
+            max_seconds=max_ms / 1000 if max_ms is not None else None,
+            target_confidence=budget.get('target_confidence'),
+            total_pages=total_pages
+        )
+        page_iter.close()
+    if truncated:
+        texts = texts[:truncated['pages_analyzed']]
+    job.complete_stage('extract')
+    return "\n\n".join(texts).strip(), serialize_result(result), truncated
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def _request_budget():
+    """
+    Read the optional analysis budget of a request: ?max_pages=&max_ms=&target_confidence=
+    
+    Returns:
+        dict: The limits that are set, or None if a limit is not positive
+    """
+    budget = {
+        'max_pages': request.args.get('max_pages', app.config['ANALYSIS_MAX_PAGES'], type=int),
+        'max_ms': request.args.get('max_ms', app.config['ANALYSIS_MAX_MS'], type=int),
+        'target_confidence': request.args.get('target_confidence', app.config['ANALYSIS_TARGET_CONFIDENCE'],
+                                              type=float)
+    }
+    if any(value is not None and value <= 0 for value in budget.values()):
+        return None
+    return {name: value for name, value in budget.items() if value is not None}
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -33,56 +292,265 @@ def upload_file():
         return jsonify({'error': 'No selected file'}), 400
     
     if file and allowed_file(file.filename):
+        budget = _request_budget()
+        if budget is None:
+            return jsonify({'error': 'Budget limits must be positive numbers'}), 400
+        
         filename = secure_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Profiling is opt-in per request: /upload?profile=1
+        with profiling() as upload_stages:
+            with timed('upload_read'):
+                data = file.read()
+            if app.config['PERSIST_UPLOADS']:
+                file_writer.write(filepath, data)
+        DOCUMENT_BYTES.observe('upload', len(data))
+        profile = upload_stages if request.args.get('profile') in ('1', 'true') else None
         
-        # Extract text from PDF
-        extracted_text = extract_text_from_pdf(filepath)
+        # Extraction and analysis run in the background; poll the job for the result
+        job = job_queue.submit(process_upload, filename, data, profile=profile, budget=budget or None)
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'status_url': f'/jobs/{job.id}',
+            'result_url': f'/jobs/{job.id}/result'
+        }), 202
+    
+    return jsonify({'error': 'Invalid file type'}), 400
+
+def _iter_batch_documents(files):
+    """
+    Yield the documents of a batch upload, opening ZIP archives member by member.
+    
+    Archive members are decompressed into memory one at a time, never onto
+    the disk; members other than PDFs (folders, __MACOSX files) are skipped.
+    
+    Args:
+        files (list): The uploaded FileStorage objects
         
-        if extracted_text:
-            # Identify potential grants and extract additional information
-            result = identify_potential_grants(extracted_text)
-            
-            # Save extracted text to a file
-            output_filename = os.path.splitext(filename)[0] + "_extracted.txt"
-            output_filepath = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
-            
-            with open(output_filepath, 'w', encoding='utf-8') as f:
-                f.write(extracted_text)
-            
-            # Format dates for JSON serialization
-            if result['dates']['start_date']:
-                result['dates']['start_date'] = result['dates']['start_date'].strftime('%Y-%m-%d')
-            if result['dates']['end_date']:
-                result['dates']['end_date'] = result['dates']['end_date'].strftime('%Y-%m-%d')
-            
-            # Format yearly dates
-            formatted_yearly_dates = []
-            for date_range in result['dates']['yearly_dates']:
-                formatted_yearly_dates.append({
-                    'start': date_range['start'].strftime('%Y-%m-%d'),
-                    'end': date_range['end'].strftime('%Y-%m-%d')
-                })
-            result['dates']['yearly_dates'] = formatted_yearly_dates
-            
-            return jsonify({
-                'success': True,
-                'text': extracted_text,
-                'download_url': f'/download/{output_filename}',
-                'grants': result['grants'],
-                'dates': result['dates'],
-                'financial': result['financial'],
-                'project': result['project']
-            })
+    Yields:
+        tuple: (filename, data, error) where error is set, and data None,
+        for a document that cannot be processed
+    """
+    max_bytes = app.config['MAX_CONTENT_LENGTH']
+    for file in files:
+        if file.filename.lower().endswith('.zip'):
+            try:
+                archive = zipfile.ZipFile(file.stream)
+            except zipfile.BadZipFile:
+                yield file.filename, None, 'Invalid ZIP archive'
+                continue
+            with archive:
+                for info in archive.infolist():
+                    name = info.filename
+                    if info.is_dir() or name.startswith('__MACOSX/') or not allowed_file(name):
+                        continue
+                    if info.file_size > max_bytes:
+                        yield name, None, 'File too large'
+                        continue
+                    try:
+                        with archive.open(info) as member:
+                            # Read one byte past the limit in case the header understates the size
+                            data = member.read(max_bytes + 1)
+                    except (zipfile.BadZipFile, RuntimeError, OSError) as e:
+                        yield name, None, f'Could not read archive member: {e}'
+                        continue
+                    if len(data) > max_bytes:
+                        yield name, None, 'File too large'
+                        continue
+                    yield name, data, None
+        elif allowed_file(file.filename):
+            data = file.read(max_bytes + 1)
+            if len(data) > max_bytes:
+                yield file.filename, None, 'File too large'
+                continue
+            yield file.filename, data, None
         else:
-            return jsonify({'error': 'Failed to extract text from PDF'}), 500
+            yield file.filename, None, 'Invalid file type'
+
+def _process_batch_document(job, results, index, filename, data, budget=None):
+    """Run process_upload for one batch document and hand its outcome to the response stream."""
+    try:
+        response = process_upload(job, filename, data, budget=budget)
+    except Exception as e:
+        results.put((index, job, None, str(e)))
+        raise
+    results.put((index, job, response, None))
+    return response
+
+def _batch_line(outcome, filenames):
+    """Format a finished batch document as its NDJSON line."""
+    index, job, response, error = outcome
+    line = {'index': index, 'filename': filenames.pop(index), 'job_id': job.id}
+    if error:
+        line.update(status=FAILED, error=error)
+    else:
+        # As from /jobs/<id>/result, the text is fetched from text_url
+        body = dict(response)
+        text = body.pop('text')
+        line.update(body, status=DONE, text_url=f'/jobs/{job.id}/text', text_length=len(text))
+    return json.dumps(line) + '\n'
+
+def _stream_batch(files, budget):
+    """
+    Submit the documents of a batch and yield an NDJSON line as each one finishes.
     
-    return jsonify({'error': 'Invalid file type'}), 400
+    Documents are read, and archive members decompressed, only as slots
+    free up: at most BATCH_MAX_IN_FLIGHT documents are held in memory or
+    waiting on the job queue at once.
+    """
+    # Documents run as jobs on the shared job queue and extraction pools;
+    # each reports back through results as soon as it finishes
+    results = queue.Queue()
+    filenames = {}  # Index -> name of each document in flight
+    try:
+        for index, (filename, data, error) in enumerate(_iter_batch_documents(files)):
+            if index >= app.config['BATCH_MAX_DOCUMENTS']:
+                yield json.dumps({'index': index, 'filename': filename, 'status': FAILED,
+                                  'error': 'Too many documents in batch'}) + '\n'
+                break
+            if error:
+                yield json.dumps({'index': index, 'filename': filename, 'status': FAILED, 'error': error}) + '\n'
+                continue
+            # Prefixed with the index: documents in different archive folders can share a name
+            stored_name = f'{index}_{secure_filename(filename) or "document.pdf"}'
+            if app.config['PERSIST_UPLOADS']:
+                file_writer.write(os.path.join(app.config['UPLOAD_FOLDER'], stored_name), data)
+            DOCUMENT_BYTES.observe('upload', len(data))
+            job_queue.submit(_process_batch_document, results, index, stored_name, data, budget=budget or None)
+            filenames[index] = filename
+            data = None  # Held by the job now; not by this generator while it waits
+            
+            # Report what has finished, and wait for a slot before reading the next document
+            while filenames and (len(filenames) >= app.config['BATCH_MAX_IN_FLIGHT'] or not results.empty()):
+                yield _batch_line(results.get(), filenames)
+        
+        while filenames:
+            yield _batch_line(results.get(), filenames)
+    finally:
+        for file in files:
+            file.close()
+
+@app.route('/batch', methods=['POST'])
+def batch_upload():
+    # Batches are allowed to be larger than single uploads
+    request.max_content_length = app.config['BATCH_MAX_CONTENT_LENGTH']
+    files = [file for file in request.files.getlist('files') + request.files.getlist('file') if file.filename]
+    if not files:
+        return jsonify({'error': 'No files'}), 400
+    budget = _request_budget()
+    if budget is None:
+        return jsonify({'error': 'Budget limits must be positive numbers'}), 400
+    
+    # The request closes its uploaded files when the view returns, so the
+    # response stream takes them over and reads them as it goes
+    detached = []
+    for file in files:
+        detached.append(FileStorage(stream=file.stream, filename=file.filename))
+        file.stream = io.BytesIO()
+    
+    # One JSON document per line, in the order the documents finish
+    return Response(_stream_batch(detached, budget), mimetype='application/x-ndjson')
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job.status == FAILED:
+        return jsonify({'error': job.error}), 500
+    if job.status != DONE:
+        # Not finished yet; report progress instead
+        return jsonify(job.to_dict()), 202
+    
+    # The text is fetched in pages from text_url unless asked for here
+    body = dict(job.result)
+    text = body.pop('text')
+    body['text_url'] = f'/jobs/{job.id}/text'
+    body['text_length'] = len(text)
+    if request.args.get('include_text') in ('1', 'true'):
+        body['text'] = text
+    return jsonify(body)
+
+@app.route('/jobs/<job_id>/text')
+def job_text(job_id):
+    job = job_queue.get(job_id)
+    if job is None or job.status != DONE:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    text = job.result['text']
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', app.config['TEXT_PAGE_CHARS'], type=int)
+    if offset < 0 or limit <= 0:
+        return jsonify({'error': 'Invalid offset or limit'}), 400
+    limit = min(limit, app.config['TEXT_PAGE_CHARS'])
+    end = min(offset + limit, len(text))
+    return jsonify({
+        'offset': offset,
+        'text': text[offset:end],
+        'total': len(text),
+        'next_offset': end if end < len(text) else None
+    })
+
+@app.route('/jobs/<job_id>/download/<filename>')
+def job_download(job_id, filename):
+    job = job_queue.get(job_id)
+    if job is None or job.status != DONE:
+        return jsonify({'error': 'Unknown job'}), 404
+    return send_file(io.BytesIO(job.result['text'].encode('utf-8')), mimetype='text/plain',
+                     as_attachment=True, download_name=secure_filename(filename), conditional=True)
+
+@app.route('/metrics')
+def metrics():
+    return render_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
 
 @app.route('/download/<filename>')
 def download_file(filename):
-    return send_file(os.path.join(app.config['UPLOAD_FOLDER'], filename), as_attachment=True)
+    # The extracted text may still be queued for writing
+    file_writer.wait(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+    # conditional=True answers Range requests with 206 partial content
+    return send_file(os.path.join(app.config['UPLOAD_FOLDER'], filename), as_attachment=True,
+                     conditional=True)
+
+@app.route('/aggregate', methods=['POST'])
+def aggregate():
+    data = request.json
+    if not isinstance(data, dict) or not (data.get('job_ids') or data.get('results')):
+        return jsonify({'error': 'Provide job_ids or results to aggregate'}), 400
+    
+    results = []
+    document_ids = []
+    missing = []
+    for job_id in data.get('job_ids') or []:
+        job = job_queue.get(job_id)
+        if job is None or job.status != DONE:
+            missing.append(job_id)
+            continue
+        results.append(job.result)
+        document_ids.append(job_id)
+    if missing:
+        return jsonify({'error': 'Unknown or unfinished jobs', 'job_ids': missing}), 404
+    
+    # Results saved earlier, e.g. from bulk_ingest.py, can be included as-is
+    supplied = data.get('results') or []
+    if not isinstance(supplied, list):
+        return jsonify({'error': 'results must be a list'}), 400
+    for index, result in enumerate(supplied):
+        try:
+            validate_result(result)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid results[{index}]: {e}'}), 400
+        results.append(result)
+        document_ids.append(f'results[{index}]')
+    
+    return jsonify(aggregate_results(results, document_ids))
 
 @app.route('/save_grant', methods=['POST'])
 def save_grant():
@@ -0,0 +1,57 @@
+"""
+Benchmark the single-pass keyword/organization matcher against the original
+per-term substring loop used by identify_potential_grants.
+
+Usage: python benchmarks/bench_keyword_matcher.py [repeat_count]
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grant_identifier import GRANT_KEYWORDS, GRANT_ORGANIZATIONS, score_sentences
+
+SAMPLE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'uploads', 'us_epa_grant_agreement_extracted.txt'
+)
+
+def legacy_score_sentences(text):
+    """The original loop: one substring search per term per sentence."""
+    scored = []
+    for sentence in re.split(r'(?<=[.!?])\s+', text):
+        keyword_count = sum(1 for keyword in GRANT_KEYWORDS if keyword.lower() in sentence.lower())
+        org_count = sum(1 for org in GRANT_ORGANIZATIONS if org.lower() in sentence.lower())
+        scored.append((sentence, keyword_count, org_count))
+    return scored
+
+def best_of(func, text, runs=5):
+    """Return the best wall-clock time of several runs, in seconds."""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    max_repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    with open(SAMPLE_PATH, 'r', encoding='utf-8') as f:
+        sample = f.read()
+    
+    print(f"{'copies':>8} {'chars':>10} {'legacy (ms)':>12} {'matcher (ms)':>13} {'speedup':>8}")
+    repeat = 1
+    while repeat <= max_repeat:
+        text = "\n\n".join([sample] * repeat)
+        if legacy_score_sentences(text) != score_sentences(text):
+            print("Results differ from the legacy loop!")
+            sys.exit(1)
+        legacy = best_of(legacy_score_sentences, text)
+        matcher = best_of(score_sentences, text)
+        print(f"{repeat:>8} {len(text):>10} {legacy * 1000:>12.2f} {matcher * 1000:>13.2f} {legacy / matcher:>7.1f}x")
+        repeat *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark serial against process-pool PDF text extraction for growing page
+counts. Larger documents are built by repeating the pages of the sample
+agreement.
+
+Usage: python benchmarks/bench_parallel_extraction.py [workers] [max_pages]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PyPDF2
+
+from pdf_extractor import extract_text_from_pdf, get_extraction_pool
+
+SAMPLE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'uploads', 'us_epa_grant_agreement.pdf'
+)
+
+def build_pdf(path, num_pages):
+    """Write a PDF with num_pages pages cycled from the sample agreement."""
+    reader = PyPDF2.PdfReader(SAMPLE_PATH)
+    writer = PyPDF2.PdfWriter()
+    for page_num in range(num_pages):
+        writer.add_page(reader.pages[page_num % len(reader.pages)])
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+def time_extraction(path, workers):
+    """Return the wall-clock time of one extraction, in seconds."""
+    start = time.perf_counter()
+    extract_text_from_pdf(path, workers=workers)
+    return time.perf_counter() - start
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    max_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 160
+    
+    # Start the pool up front so its spawn cost is not charged to one size
+    get_extraction_pool(workers).submit(int).result()
+    
+    print(f"workers={workers} cpus={os.cpu_count()}")
+    print(f"{'pages':>6} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        num_pages = 10
+        while num_pages <= max_pages:
+            path = os.path.join(tmp_dir, f'bench_{num_pages}.pdf')
+            build_pdf(path, num_pages)
+            if extract_text_from_pdf(path) != extract_text_from_pdf(path, workers=workers):
+                print("Parallel text differs from serial text!")
+                sys.exit(1)
+            serial = time_extraction(path, 1)
+            parallel = time_extraction(path, workers)
+            print(f"{num_pages:>6} {serial:>11.2f} {parallel:>13.2f} {serial / parallel:>7.1f}x")
+            num_pages *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Time each stage of the extraction pipeline on a synthetic grant agreement.
+
+The stages are PDF parsing, sentence splitting, grant scoring, financial
+extraction from text and from table rows, and date and project extraction.
+Results are written as JSON so runs can be compared: pass --compare with
+the JSON of an earlier run to print the ratio of each stage against it.
+
+Usage: python benchmarks/bench_pipeline.py [--pages N] [--budget-tables N]
+           [--date-mentions N] [--org-mentions P] [--seed N] [--runs N]
+           [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_extractor import iter_pdf_pages
+from grant_identifier import (
+    ANALYZER_VERSION, SENTENCE_BOUNDARY_REGEX, TopGrantCandidates, _collect_grant_candidates,
+    extract_financial_fields, extract_financial_fields_from_rows, extract_dates, extract_project_info
+)
+from synthetic_corpus import generate_agreement, write_pdf
+
+def time_runs(func, arg, runs):
+    """Return the wall-clock times of several calls, in seconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return times
+
+def run_stages(pdf_path, runs):
+    """
+    Time every pipeline stage on one PDF.
+
+    Args:
+        pdf_path (str): The PDF to process
+        runs (int): Number of timed runs per stage
+
+    Returns:
+        dict: Stage name -> {'best_s', 'median_s', 'runs'}
+    """
+    # Joined as extract_text_from_pdf joins pages
+    text = "\n\n".join(iter_pdf_pages(pdf_path)).strip()
+    table_rows = [rows for _, rows in iter_pdf_pages(pdf_path, layout=True)]
+    stages = [
+        ('pdf_parse', lambda path: list(iter_pdf_pages(path)), pdf_path),
+        ('sentence_split', SENTENCE_BOUNDARY_REGEX.split, text),
+        ('grant_scoring', lambda t: _collect_grant_candidates(t, TopGrantCandidates()), text),
+        ('financial', extract_financial_fields, text),
+        ('financial_tables', extract_financial_fields_from_rows, table_rows),
+        ('dates', extract_dates, text),
+        ('project', extract_project_info, text),
+    ]
+    results = {}
+    for name, func, arg in stages:
+        times = time_runs(func, arg, runs)
+        results[name] = {
+            'best_s': min(times),
+            'median_s': statistics.median(times),
+            'runs': len(times)
+        }
+    return results, len(text)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each stage of the extraction pipeline.")
+    parser.add_argument('--pages', type=int, default=20, help="Pages in the synthetic agreement")
+    parser.add_argument('--budget-tables', type=int, default=3, help="Budget period tables")
+    parser.add_argument('--date-mentions', type=int, default=4, help="Start/end date lines")
+    parser.add_argument('--org-mentions', type=float, default=0.3,
+                        help="Chance (0-1) that a sentence names a funding agency")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed of the generator")
+    parser.add_argument('--runs', type=int, default=5, help="Timed runs per stage")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    corpus = {
+        'pages': args.pages,
+        'budget_tables': args.budget_tables,
+        'date_mentions': args.date_mentions,
+        'org_mentions': args.org_mentions,
+        'seed': args.seed
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, 'agreement.pdf')
+        write_pdf(pdf_path, generate_agreement(**corpus))
+        stages, chars = run_stages(pdf_path, args.runs)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'analyzer_version': ANALYZER_VERSION,
+            'corpus': corpus,
+            'chars': chars
+        },
+        'stages': stages
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['meta']['corpus'] != corpus:
+            print("Warning: the baseline was run on a different corpus")
+
+    print(f"pages={args.pages} chars={chars} runs={args.runs}")
+    header = f"{'stage':<16} {'best (ms)':>10} {'median (ms)':>12}"
+    if baseline:
+        header += f" {'baseline (ms)':>14} {'ratio':>7}"
+    print(header)
+    for name, timing in stages.items():
+        line = f"{name:<16} {timing['best_s'] * 1000:>10.2f} {timing['median_s'] * 1000:>12.2f}"
+        if baseline and name in baseline['stages']:
+            before = baseline['stages'][name]['best_s']
+            line += f" {before * 1000:>14.2f} {timing['best_s'] / before:>6.2f}x"
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
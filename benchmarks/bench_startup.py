@@ -0,0 +1,111 @@
+"""
+Time how long a cold process takes to import each module and to analyze
+its first document.
+
+Every measurement runs in a fresh interpreter, so nothing is shared with
+earlier runs except the bytecode cache (compile it first with
+``python -m compileall -q .``). The first-analysis timings include
+compiling the analyzer's patterns, which happens on first use unless
+grant_identifier.precompile_analyzer() was called, as serve.py does in the
+gunicorn master before forking its workers. Results are written as JSON
+so runs can be compared, as with bench_pipeline.py.
+
+Usage: python benchmarks/bench_startup.py [--runs N]
+           [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stage name -> code timed in a fresh interpreter, after `import time`
+STAGES = {
+    'import_grant_identifier': 'import grant_identifier',
+    'import_pdf_extractor': 'import pdf_extractor',
+    'import_portfolio': 'import portfolio',
+    'import_bulk_ingest': 'import bulk_ingest',
+    'import_app': 'import app',
+    'first_analysis': (
+        'from grant_identifier import identify_potential_grants\n'
+        'identify_potential_grants("The EPA Brownfields Grant for Harbor County supports this work. '
+        'Total Federal Funds: $250,000. Project Title: Harbor Cleanup.")'
+    ),
+    'precompile_analyzer': 'from grant_identifier import precompile_analyzer\nprecompile_analyzer()',
+}
+
+_TIMER = """
+import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+def time_stage(code, runs):
+    """Return the wall-clock times of code in several fresh interpreters, in seconds."""
+    times = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _TIMER.format(code=code)],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description="Time cold imports and the first analysis.")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per stage")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    stages = {}
+    for name, code in STAGES.items():
+        try:
+            times = time_stage(code, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"Skipping {name}: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+            continue
+        stages[name] = {
+            'best_s': min(times),
+            'median_s': statistics.median(times),
+            'runs': len(times)
+        }
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'stages': stages
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    header = f"{'stage':<24} {'best (ms)':>10} {'median (ms)':>12}"
+    if baseline:
+        header += f" {'baseline (ms)':>14} {'ratio':>7}"
+    print(header)
+    for name, timing in stages.items():
+        line = f"{name:<24} {timing['best_s'] * 1000:>10.2f} {timing['median_s'] * 1000:>12.2f}"
+        if baseline and name in baseline['stages']:
+            before = baseline['stages'][name]['best_s']
+            line += f" {before * 1000:>14.2f} {timing['best_s'] / before:>6.2f}x"
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
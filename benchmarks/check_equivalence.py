@@ -0,0 +1,187 @@
+"""
+Check the optimized analyzer paths against their straightforward references.
+
+Each check runs on randomized inputs and compares exact output:
+
+- patterns: scan_pattern_family (one fused, lookahead-based scan) against
+  running every financial, date and project pattern on its own with
+  re.finditer, on texts mixing case and the characters that make the
+  lowercased fast path fall back
+- sentences: iter_sentence_spans against re.split(r'(?<=[.!?])\\s+', text)
+- streaming: StreamingGrantAnalyzer fed a document split into random pages
+  against identify_potential_grants on the joined text
+- top_k: TopGrantCandidates against keeping every name's best sentence and
+  stably sorting them all
+
+The process exits with status 1 on the first mismatch, printing the seed and
+input that produced it.
+
+Usage: python benchmarks/check_equivalence.py [--trials N] [--seed N]
+           [--check patterns|sentences|streaming|top_k]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from grant_identifier import (
+    DATE_FAMILY, FINANCIAL_FAMILY, PROJECT_FAMILY, StreamingGrantAnalyzer, TopGrantCandidates,
+    identify_potential_grants, iter_sentence_spans, scan_pattern_family, serialize_result
+)
+from synthetic_corpus import generate_agreement
+
+SAMPLE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'uploads', 'us_epa_grant_agreement_extracted.txt'
+)
+
+# Fragments that hit the financial, date and project patterns, including
+# overlapping hits of different patterns ("Project Date", "Budget Period")
+FRAGMENTS = [
+    "Salary and Wages: $12,500.00", "personnel cost 4,000", "Wages $900", "Indirect Costs: 3,210.55",
+    "Overhead 1,000", "F&A costs: $77", "Travel: $2,000", "Transportation 450", "Supplies 300.10",
+    "materials: 25", "Fringe Benefits: 8,000", "benefit 12", "Equipment $5,500", "Capital expenses 9",
+    "Other Costs: 1,111", "Miscellaneous 42", "Start Date: 01/15/2021", "end date 12/31/2023",
+    "Project Date: 3-4-22", "Period: 1/1/2020 to 12/31/2021", "Budget Period: 07/01/19 - 06/30/20",
+    "Project Title: Harbor Cleanup Initiative", "PROGRAM TITLE: Safe Routes", "Project Description: Testing",
+    "program description: soil remediation\n", "EPA Brownfields Grant.", "Total Federal Funds: $250,000.",
+]
+# Lowercasing these changes the text's length or differs from re.IGNORECASE folding
+CASE_UNSAFE = ['İ', 'ı', 'ſ']
+SEPARATORS = [' ', '\n', '. ', '! ', '? ', '.\n\n', ': ', '  ', '', '$', ',']
+
+def random_text(rng, sample):
+    """Build a text of random fragments, sample slices and case changes."""
+    parts = []
+    for _ in range(rng.randint(1, 30)):
+        choice = rng.random()
+        if choice < 0.5:
+            part = rng.choice(FRAGMENTS)
+        elif choice < 0.8 and sample:
+            start = rng.randrange(len(sample))
+            part = sample[start:start + rng.randint(1, 400)]
+        else:
+            part = rng.choice(CASE_UNSAFE) if rng.random() < 0.3 else str(rng.randint(0, 99999))
+        if rng.random() < 0.2:
+            part = part.upper()
+        parts.append(part)
+        parts.append(rng.choice(SEPARATORS))
+    return ''.join(parts)
+
+def check_patterns(rng, sample):
+    """Compare one fused family scan with per-pattern re.finditer."""
+    text = random_text(rng, sample)
+    pos = rng.randint(0, len(text)) if rng.random() < 0.2 else 0
+    for family in (FINANCIAL_FAMILY, DATE_FAMILY, PROJECT_FAMILY):
+        fused = scan_pattern_family(family, text, pos)
+        for member, hits in zip(family.members, fused):
+            expected = [(match.start(), match.end(), match.groups())
+                        for match in re.compile(member.pattern).finditer(text, pos)]
+            actual = [(hit.start, hit.end, hit.groups) for hit in hits]
+            if actual != expected:
+                return f"{member.pattern!r} at pos {pos} on {text!r}: {actual} != {expected}"
+    return None
+
+def check_sentences(rng, sample):
+    """Compare sentence spans with re.split."""
+    text = random_text(rng, sample)
+    actual = [text[start:end] for start, end in iter_sentence_spans(text)]
+    expected = re.split(r'(?<=[.!?])\s+', text)
+    if actual != expected:
+        return f"{text!r}: {actual} != {expected}"
+    return None
+
+def random_document(rng, sample):
+    """Build a document text from synthetic pages, sample text and fragments."""
+    pages = generate_agreement(pages=rng.randint(1, 4), seed=rng.randrange(1 << 30))
+    text = "\n\n".join("\n".join(lines) for lines in pages)
+    if rng.random() < 0.5:
+        text = random_text(rng, sample) + "\n\n" + text
+    return text
+
+def split_pages(rng, text):
+    """Split text into random pages, including empty and whitespace-only ones."""
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 12)))
+    pages = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+    for _ in range(rng.randint(0, 2)):
+        pages.insert(rng.randint(0, len(pages)), rng.choice(['', ' ', '\n']))
+    return pages
+
+def check_streaming(rng, sample):
+    """Compare the streaming analyzer on random page splits with a full analysis."""
+    pages = split_pages(rng, random_document(rng, sample))
+    analyzer = StreamingGrantAnalyzer()
+    for page in pages:
+        analyzer.feed(page)
+    actual = serialize_result(analyzer.finish())
+    # Joined and stripped as pdf_extractor.extract_text_from_pdf does
+    expected = serialize_result(identify_potential_grants("\n\n".join(pages).strip()))
+    if actual != expected:
+        return f"pages {pages!r}:\n{actual}\n!=\n{expected}"
+    return None
+
+def reference_top_k(offers, k):
+    """Keep each name's most confident offer (the first on ties) and stably sort them all."""
+    best = {}  # Lowercased name -> (confidence, name, span); insertion order is first-offer order
+    for name, confidence, span in offers:
+        key = name.lower()
+        if key not in best or confidence > best[key][0]:
+            best[key] = (confidence, name, span)
+    ranked = sorted(best.values(), key=lambda entry: -entry[0])
+    return [(name, confidence, span) for confidence, name, span in ranked[:k]]
+
+def check_top_k(rng, sample):
+    """Compare TopGrantCandidates with the reference on a random offer sequence."""
+    names = [f"{rng.choice(['Clean', 'clean', 'CLEAN'])} Grant {index}" for index in range(rng.randint(1, 12))]
+    confidences = [0.1 * step for step in range(11)]
+    offers = []
+    for position in range(rng.randint(0, 40)):
+        name = rng.choice(names)
+        if rng.random() < 0.3:
+            name = name.swapcase()
+        offers.append((name, rng.choice(confidences), (position, position + 1)))
+    k = rng.randint(1, 5)
+    top = TopGrantCandidates(k)
+    text = 'x' * (len(offers) + 1)
+    for name, confidence, (start, end) in offers:
+        top.offer(name, confidence, text, start, end)
+    actual = [(candidate.name, candidate.confidence, (candidate.start, candidate.end)) for candidate in top.ranked()]
+    expected = reference_top_k(offers, k)
+    if actual != expected:
+        return f"k={k} offers {offers}: {actual} != {expected}"
+    return None
+
+CHECKS = {
+    'patterns': check_patterns,
+    'sentences': check_sentences,
+    'streaming': check_streaming,
+    'top_k': check_top_k,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Check optimized analyzer paths against their references.")
+    parser.add_argument('--trials', type=int, default=300, help="Random inputs per check")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    parser.add_argument('--check', choices=sorted(CHECKS), action='append',
+                        help="Run only this check (repeatable; default: all)")
+    args = parser.parse_args()
+
+    sample = ''
+    if os.path.exists(SAMPLE_PATH):
+        with open(SAMPLE_PATH, 'r', encoding='utf-8') as f:
+            sample = f.read()
+
+    for name in args.check or CHECKS:
+        rng = random.Random(f"{args.seed}:{name}")
+        for trial in range(args.trials):
+            mismatch = CHECKS[name](rng, sample)
+            if mismatch:
+                print(f"{name}: mismatch in trial {trial} (seed {args.seed}): {mismatch}")
+                sys.exit(1)
+        print(f"{name}: {args.trials} trials match")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Measure the throughput of a running server on /upload and /save_grant.
+
+Requests are sent from a pool of client threads against a server started
+with serve.py (or app.py). For /upload a request counts as done when the
+job is accepted, or with --wait when its result is ready, which measures
+end-to-end documents per second. Results are written as JSON with --output.
+
+Usage: python benchmarks/load_test.py [--url http://127.0.0.1:8000]
+           [--endpoint upload|save_grant|both] [--requests N]
+           [--concurrency N] [--pdf file.pdf] [--pages N] [--wait]
+           [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_corpus import generate_agreement, write_pdf
+
+def _request(url, body=None, content_type=None):
+    """Send a request and return (status, decoded JSON body)."""
+    req = urllib.request.Request(url, data=body, method='POST' if body is not None else 'GET')
+    if content_type:
+        req.add_header('Content-Type', content_type)
+    try:
+        with urllib.request.urlopen(req, timeout=300) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+def _multipart(filename, data):
+    """Encode a PDF as the multipart/form-data body of an upload."""
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        'Content-Type: application/pdf\r\n\r\n'
+    ).encode('utf-8') + data + f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    return body, f'multipart/form-data; boundary={boundary}'
+
+def upload(url, pdf_data, wait):
+    """POST one upload; with wait, poll its job until it finishes."""
+    # A unique name per request; the content is the same, as in a repeat upload
+    body, content_type = _multipart(f'load_{uuid.uuid4().hex[:8]}.pdf', pdf_data)
+    status, reply = _request(url + '/upload', body, content_type)
+    if status != 202 or not wait:
+        return status == 202
+    status_url = url + reply['status_url']
+    while True:
+        status, reply = _request(status_url)
+        if status != 200:
+            return False
+        if reply['status'] in ('done', 'failed'):
+            return reply['status'] == 'done'
+        time.sleep(0.05)
+
+def save_grant(url, index):
+    """POST one saved grant."""
+    body = json.dumps({
+        'grant_name': f'Load Test Grant {index % 50}',
+        'context': f'Load test context {index}'
+    }).encode('utf-8')
+    status, _ = _request(url + '/save_grant', body, 'application/json')
+    return status == 200
+
+def run_load(func, total, concurrency):
+    """
+    Call func(index) total times from concurrency threads.
+
+    Returns:
+        dict: Throughput, error count and latency percentiles
+    """
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(index):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = func(index)
+        except OSError:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'errors': errors,
+        'wall_s': wall,
+        'requests_per_s': total / wall,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        'p99_ms': latencies[int(0.99 * (len(latencies) - 1))] * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /upload and /save_grant throughput.")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="Base URL of the server")
+    parser.add_argument('--endpoint', choices=('upload', 'save_grant', 'both'), default='both',
+                        help="Endpoint to load (default: both)")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint")
+    parser.add_argument('--concurrency', type=int, default=16, help="Client threads")
+    parser.add_argument('--pdf', help="PDF to upload (default: a synthetic agreement)")
+    parser.add_argument('--pages', type=int, default=10, help="Pages in the synthetic agreement")
+    parser.add_argument('--wait', action='store_true', help="Count an upload as done when its result is ready")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args()
+    url = args.url.rstrip('/')
+
+    if args.pdf:
+        with open(args.pdf, 'rb') as f:
+            pdf_data = f.read()
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, 'agreement.pdf')
+            write_pdf(pdf_path, generate_agreement(args.pages))
+            with open(pdf_path, 'rb') as f:
+                pdf_data = f.read()
+
+    stages = {}
+    if args.endpoint in ('upload', 'both'):
+        stages['upload'] = run_load(lambda i: upload(url, pdf_data, args.wait), args.requests, args.concurrency)
+    if args.endpoint in ('save_grant', 'both'):
+        stages['save_grant'] = run_load(lambda i: save_grant(url, i), args.requests, args.concurrency)
+
+    print(f"url={url} requests={args.requests} concurrency={args.concurrency} wait={args.wait}")
+    print(f"{'endpoint':<12} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}")
+    for name, result in stages.items():
+        print(f"{name:<12} {result['requests_per_s']:>8.1f} {result['p50_ms']:>9.1f} "
+              f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['errors']:>7}")
+
+    if args.output:
+        results = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'url': url,
+                'concurrency': args.concurrency,
+                'wait': args.wait,
+                'pdf_bytes': len(pdf_data)
+            },
+            'endpoints': stages
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
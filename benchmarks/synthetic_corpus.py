@@ -0,0 +1,219 @@
+"""
+Generate synthetic grant agreements for benchmarking.
+
+Documents are built from a seeded random generator, so the same parameters
+always produce the same text and the same PDF bytes. The PDF writer is a
+minimal one (Helvetica text only) that PyPDF2 reads back line for line.
+
+Usage: python benchmarks/synthetic_corpus.py output_dir [count] [pages] [seed]
+"""
+import os
+import random
+import sys
+
+LINES_PER_PAGE = 55
+LINE_WIDTH = 90
+
+AGENCIES = [
+    ("Environmental Protection Agency", "EPA"),
+    ("National Science Foundation", "NSF"),
+    ("National Institutes of Health", "NIH"),
+    ("Department of Energy", "DOE"),
+    ("Department of Agriculture", "USDA"),
+    ("National Oceanic and Atmospheric Administration", "NOAA"),
+]
+
+PROGRAMS = [
+    "Clean Water State Revolving Fund", "Brownfields Assessment", "Coastal Resilience",
+    "Rural Broadband Pilot", "Community Health Research", "Advanced Manufacturing",
+    "Wetland Restoration", "STEM Education Outreach", "Wildfire Mitigation",
+]
+
+RECIPIENTS = [
+    "State Water Resources Control Board", "University of Northern Plains",
+    "Harbor County Public Works", "Riverbend Community Foundation",
+    "Lakeside Institute of Technology", "Mesa Valley Health Council",
+]
+
+FILLER = [
+    "The recipient agrees to comply with all applicable terms and conditions of this agreement.",
+    "Reports shall be submitted to the project officer within thirty days of the end of each quarter.",
+    "Costs incurred prior to the effective date of this award are not allowable unless approved in writing.",
+    "The recipient must maintain records sufficient to document the use of funds for three years.",
+    "Any changes to key personnel require prior approval from the awarding office.",
+    "Program income earned during the project period shall be added to the total project budget.",
+    "The recipient shall ensure that subrecipients are informed of the requirements of this award.",
+    "Equipment purchased under this agreement remains subject to federal property standards.",
+    "Payments will be made on a reimbursement basis following review of supporting documentation.",
+    "The state shall provide matching funds as described in the approved work plan.",
+]
+
+BUDGET_LINES = [
+    ("Salary and Wages", 40000, 400000),
+    ("Fringe Benefits", 10000, 120000),
+    ("Travel", 1000, 40000),
+    ("Supplies", 500, 30000),
+    ("Equipment", 5000, 250000),
+    ("Contractual", 10000, 500000),
+    ("Other Costs", 1000, 60000),
+    ("Indirect Costs", 5000, 90000),
+]
+
+def _money(rng, low, high):
+    return f"${rng.randint(low, high):,}.00"
+
+def _date(rng, year):
+    return f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{year}"
+
+def _budget_table(rng, year):
+    """Lines of one budget period table."""
+    lines = [f"BUDGET PERIOD: {_date(rng, year)} to {_date(rng, year + 1)}"]
+    total = 0
+    for label, low, high in BUDGET_LINES:
+        amount = rng.randint(low, high)
+        total += amount
+        lines.append(f"{label}: ${amount:,}.00")
+    lines.append(f"Total Budget: ${total:,}.00")
+    return lines
+
+def _sentence(rng, org_mentions):
+    """One filler sentence, naming an agency with probability org_mentions."""
+    sentence = rng.choice(FILLER)
+    if rng.random() < org_mentions:
+        agency, acronym = rng.choice(AGENCIES)
+        program = rng.choice(PROGRAMS)
+        sentence += f" The {agency} ({acronym}) {program} Grant for {rng.choice(RECIPIENTS)} supports this work."
+    return sentence
+
+def _wrap(paragraph, width=LINE_WIDTH):
+    """Break a paragraph into lines of at most width characters."""
+    lines = []
+    current = ''
+    for word in paragraph.split():
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+def generate_agreement(pages=10, budget_tables=3, date_mentions=4, org_mentions=0.3, seed=0):
+    """
+    Build the text of a synthetic grant agreement.
+
+    Args:
+        pages (int): Number of pages
+        budget_tables (int): Number of budget period tables, spread over the pages
+        date_mentions (int): Number of start/end/project period date lines
+        org_mentions (float): Chance (0-1) that a sentence names a funding agency
+        seed (int): Random seed
+
+    Returns:
+        list: Pages, each a list of text lines
+    """
+    rng = random.Random(seed)
+    agency, acronym = rng.choice(AGENCIES)
+    first_year = rng.randint(2015, 2024)
+
+    header = [
+        f"{agency.upper()} ASSISTANCE AGREEMENT",
+        f"Project Title: {rng.choice(PROGRAMS)} for {rng.choice(RECIPIENTS)}",
+        f"Project Description: {rng.choice(FILLER)}",
+        f"PROJECT PERIOD: {_date(rng, first_year)} to {_date(rng, first_year + budget_tables)}",
+        "",
+    ]
+
+    # Special blocks (tables and date lines) are scattered over the pages
+    blocks = [_budget_table(rng, first_year + i) for i in range(budget_tables)]
+    for i in range(date_mentions):
+        label = rng.choice(["Start Date", "End Date", "Project Date"])
+        blocks.append([f"{label}: {_date(rng, first_year + i % max(budget_tables, 1))}"])
+    placements = {}
+    for block in blocks:
+        placements.setdefault(rng.randrange(pages), []).append(block)
+
+    result = []
+    for page_num in range(pages):
+        lines = list(header) if page_num == 0 else []
+        for block in placements.get(page_num, []):
+            lines.extend(block)
+            lines.append("")
+        while len(lines) < LINES_PER_PAGE:
+            paragraph = ' '.join(_sentence(rng, org_mentions) for _ in range(rng.randint(2, 4)))
+            lines.extend(_wrap(paragraph))
+            lines.append("")
+        result.append(lines[:LINES_PER_PAGE])
+    return result
+
+def _pdf_string(text):
+    """Escape text for a PDF literal string."""
+    return '(' + text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+def write_pdf(path, pages):
+    """
+    Write pages of text lines as a PDF file.
+
+    Args:
+        path (str): Output path
+        pages (list): Pages, each a list of ASCII text lines
+    """
+    objects = []  # Object bodies; object n is objects[n - 1]
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(None)
+    page_tree = add(None)
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for lines in pages:
+        content = ["BT /F1 10 Tf 13 TL 50 760 Td"]
+        for line in lines:
+            content.append(_pdf_string(line) + " Tj T*")
+        content.append("ET")
+        stream = "\n".join(content).encode('latin-1')
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (page_tree, font, content_id)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % page_tree
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[page_tree - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, xref_at
+    )
+    with open(path, 'wb') as f:
+        f.write(out)
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    output_dir = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    pages = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+
+    os.makedirs(output_dir, exist_ok=True)
+    for i in range(count):
+        path = os.path.join(output_dir, f"synthetic_{seed + i:04d}.pdf")
+        write_pdf(path, generate_agreement(pages=pages, seed=seed + i))
+    print(f"Wrote {count} agreements of {pages} pages to {output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+from pdf_extractor import PageOcr, iter_pdf_pages, needs_ocr, ocr_rows
+from grant_identifier import identify_potential_grants, serialize_result
+from result_cache import OcrCache
+
+# Size bound of the OCR cache used with --ocr
+OCR_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+def find_pdfs(root_dir):
+    """
+    Walk a directory tree and list the PDF files in it.
+    
+    Args:
+        root_dir (str): Directory to search
+        
+    Returns:
+        list: Paths relative to root_dir, in a stable sorted order
+    """
+    pdfs = []
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith('.pdf'):
+                pdfs.append(os.path.relpath(os.path.join(dirpath, filename), root_dir))
+    return pdfs
+
+def load_finished(output_path, retry_failed=False):
+    """
+    Read the paths already recorded in a JSON Lines output file.
+    
+    Args:
+        output_path (str): Output file from a previous (possibly interrupted) run
+        retry_failed (bool): Whether records with an error count as unfinished
+        
+    Returns:
+        set: Relative paths that do not need processing again
+    """
+    finished = set()
+    if not os.path.exists(output_path):
+        return finished
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interruption; the file is redone
+                continue
+            if retry_failed and record.get('error'):
+                continue
+            finished.add(record['path'])
+    return finished
+
+def process_pdf(task):
+    """
+    Extract and analyze one PDF (pool worker).
+    
+    Args:
+        task (tuple): (root_dir, relative_path, ocr_cache_dir), where
+            ocr_cache_dir is None unless scanned pages are to be OCRed
+        
+    Returns:
+        dict: JSON Lines record for the file
+    """
+    root_dir, rel_path, ocr_cache_dir = task
+    start = time.perf_counter()
+    record = {'path': rel_path}
+    try:
+        pdf_path = os.path.join(root_dir, rel_path)
+        pages = list(iter_pdf_pages(pdf_path, layout=True))
+        if ocr_cache_dir:
+            # Documents already run in parallel, so each is OCRed in its own worker
+            ocr = PageOcr(cache=OcrCache(ocr_cache_dir, OCR_CACHE_MAX_BYTES))
+            scanned = [page_num for page_num, (page_text, _) in enumerate(pages) if needs_ocr(page_text)]
+            recognized = ocr.recognize(pdf_path, scanned)
+            for page_num, page_text in recognized.items():
+                pages[page_num] = (page_text, ocr_rows(page_text))
+            record['pages_ocr'] = len(recognized)
+        text = "\n\n".join(page_text for page_text, _ in pages).strip()
+        record['pages'] = len(pages)
+        record['chars'] = len(text)
+        if text:
+            table_rows = [rows for _, rows in pages]
+            record['result'] = serialize_result(identify_potential_grants(text, table_rows))
+        else:
+            record['error'] = 'Failed to extract text from PDF'
+    except Exception as e:
+        record['error'] = str(e)
+    record['seconds'] = round(time.perf_counter() - start, 3)
+    return record
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract and analyze every PDF under a directory.")
+    parser.add_argument('root_dir', help="Directory tree to ingest")
+    parser.add_argument('output', help="JSON Lines file to append results to")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="Process files again whose previous record has an error")
+    parser.add_argument('--ocr', action='store_true',
+                        help="OCR pages that have no text layer (needs Tesseract)")
+    parser.add_argument('--ocr-cache', default=os.path.join('cache', 'ocr'),
+                        help="Directory of the per-page OCR cache (default: cache/ocr)")
+    args = parser.parse_args()
+    
+    all_pdfs = find_pdfs(args.root_dir)
+    finished = load_finished(args.output, args.retry_failed)
+    pending = [path for path in all_pdfs if path not in finished]
+    print(f"Found {len(all_pdfs)} PDFs, {len(all_pdfs) - len(pending)} already done, {len(pending)} to process")
+    if not pending:
+        return
+    
+    # Make sure a line cut short by an interruption does not swallow the next record
+    if os.path.exists(args.output) and os.path.getsize(args.output) > 0:
+        with open(args.output, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    else:
+        needs_newline = False
+    
+    docs = 0
+    pages = 0
+    failures = 0
+    start = time.perf_counter()
+    with open(args.output, 'a', encoding='utf-8') as out, \
+            multiprocessing.Pool(args.workers) as pool:
+        if needs_newline:
+            out.write('\n')
+        ocr_cache_dir = args.ocr_cache if args.ocr else None
+        tasks = [(args.root_dir, path, ocr_cache_dir) for path in pending]
+        for record in pool.imap_unordered(process_pdf, tasks):
+            out.write(json.dumps(record) + '\n')
+            # Flush per record so an interrupted run can resume where it stopped
+            out.flush()
+            docs += 1
+            pages += record.get('pages', 0)
+            if record.get('error'):
+                failures += 1
+                print(f"Failed: {record['path']}: {record['error']}")
+    elapsed = time.perf_counter() - start
+    
+    print(f"\nProcessed {docs} documents ({pages} pages, {failures} failed) in {elapsed:.1f}s")
+    print(f"Throughput: {docs / elapsed:.2f} docs/sec, {pages / elapsed:.2f} pages/sec")
+
+if __name__ == "__main__":
+    main()
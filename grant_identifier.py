@@ -1,9 +1,18 @@
-import re
-import json
+import heapq
 import os
-from collections import defaultdict
+import re
+import threading
+import time
+from collections import defaultdict, namedtuple
 from datetime import datetime
 
+from grant_store import GrantStore
+from metrics import timed
+
+# Bump whenever a change alters the output of identify_potential_grants, so
+# results cached under the previous version are not served again.
+ANALYZER_VERSION = "3"
+
 # Grant-related keywords and patterns for context analysis
 GRANT_KEYWORDS = [
     "grant", "award", "funding", "program", "project", "initiative", "scheme",
@@ -22,6 +31,237 @@ GRANT_ORGANIZATIONS = [
     "IRS", "NIST", "NOAA", "NRC", "OSHA", "Peace Corps", "SBA", "SSA", "USDA", "USPS"
 ]
 
+class LazyObject:
+    """
+    Stand-in for an object that is built the first time it is used.
+    
+    Attribute access is forwarded to the object returned by factory, which
+    is called once. Compiling the analyzer's regexes is most of the cost of
+    importing this module, so the large ones are wrapped in LazyObject: a
+    process that never analyzes a document (a CLI, a cache hit) never
+    compiles them. precompile_analyzer() builds them all up front.
+    """
+    
+    def __init__(self, factory):
+        self._factory = factory
+        self._target = None
+    
+    def resolve(self):
+        """Build the object if needed and return it."""
+        target = self._target
+        if target is None:
+            # Two threads may both build it; either result is equivalent
+            target = self._target = self._factory()
+        return target
+    
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+def _build_term_regex(terms):
+    """
+    Compile a list of lowercase terms into a single trie-shaped regex.
+    
+    The alternation is wrapped in a lookahead so that ``finditer`` reports a
+    (zero-width) match at every offset where a term starts, which means
+    overlapping hits such as "ed" inside "educational" are all seen. At each
+    offset the regex prefers the longest term; shorter terms that are a prefix
+    of it are recovered through ``_TERM_PREFIXES``.
+    
+    Args:
+        terms (iterable): Lowercase terms to match
+        
+    Returns:
+        re.Pattern: Compiled pattern whose group 1 is the longest term found
+    """
+    return re.compile('(?=(' + _build_trie_pattern(terms) + '))')
+
+def _build_trie_pattern(terms, separator=None):
+    """
+    Build the regex source of a trie over terms, preferring longer terms.
+    
+    Args:
+        terms (iterable): Lowercase terms to match
+        separator (str): Regex source that spaces in the terms stand for
+            (default: a literal space)
+        
+    Returns:
+        str: Uncompiled pattern matching any one of the terms
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = True
+    
+    def to_pattern(node):
+        branches = []
+        for char in sorted(k for k in node if k):
+            if char == ' ' and separator is not None:
+                branches.append(separator + to_pattern(node[char]))
+            else:
+                branches.append(re.escape(char) + to_pattern(node[char]))
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # A term ends here: longer continuations are optional and greedy
+            return '(?:' + body + ')?'
+        return body
+    
+    return to_pattern(trie)
+
+def _build_grant_terms():
+    """Build the combined keyword/organization matcher state."""
+    weights = {}
+    for keyword in GRANT_KEYWORDS:
+        kw, org = weights.get(keyword.lower(), (0, 0))
+        weights[keyword.lower()] = (kw + 1, org)
+    for organization in GRANT_ORGANIZATIONS:
+        kw, org = weights.get(organization.lower(), (0, 0))
+        weights[organization.lower()] = (kw, org + 1)
+    
+    prefixes = {
+        term: [other for other in weights if other != term and term.startswith(other)]
+        for term in weights
+    }
+    return weights, prefixes, LazyObject(lambda: _build_term_regex(weights))
+
+# Lowercased term -> (keyword multiplicity, organization multiplicity). Terms
+# listed twice (e.g. "USDA") count twice, as they do in a per-term loop.
+_TERM_WEIGHTS, _TERM_PREFIXES, GRANT_TERM_REGEX = _build_grant_terms()
+
+SENTENCE_BOUNDARY_REGEX = re.compile(r'(?<=[.!?])\s+')
+
+def count_grant_terms(text):
+    """
+    Count the distinct grant keywords and organizations mentioned in text.
+    
+    Args:
+        text (str): The text to analyze
+        
+    Returns:
+        tuple: (keyword_count, org_count)
+    """
+    found = set()
+    for match in GRANT_TERM_REGEX.finditer(text.lower()):
+        term = match.group(1)
+        found.add(term)
+        found.update(_TERM_PREFIXES[term])
+    return _sum_term_weights(found)
+
+def _sum_term_weights(found):
+    """Sum keyword/organization weights over a set of matched terms."""
+    keyword_count = 0
+    org_count = 0
+    for term in found:
+        kw, org = _TERM_WEIGHTS[term]
+        keyword_count += kw
+        org_count += org
+    return keyword_count, org_count
+
+WORD_REGEX = re.compile(r'\S+')
+
+def iter_sentence_spans(text):
+    """
+    Yield the (start, end) offsets of the sentences of text.
+    
+    The spans are exactly the pieces ``re.split(r'(?<=[.!?])\s+', text)``
+    would return, but no sentence is copied out of the document.
+    
+    Args:
+        text (str): The text to segment
+        
+    Yields:
+        tuple: (start, end) offsets of each sentence, in document order
+    """
+    start = 0
+    for boundary in SENTENCE_BOUNDARY_REGEX.finditer(text):
+        yield start, boundary.start()
+        start = boundary.end()
+    yield start, len(text)
+
+def lower_document(text):
+    """
+    Lowercase text once for offset-based matching.
+    
+    Returns:
+        str: The lowercased text, or None if lowercasing changes its length
+        (some characters do), in which case offsets into it would not line
+        up with text
+    """
+    lowered = text.lower()
+    return lowered if len(lowered) == len(text) else None
+
+def score_sentence_spans(text, lowered=None):
+    """
+    Segment text into sentences and score each one in a single pass.
+    
+    Every grant keyword/organization hit is found with one scan over the
+    lowercased document instead of one substring search per term per sentence.
+    
+    Args:
+        text (str): The text to analyze
+        lowered (str): lower_document(text), if the caller already has it
+        
+    Yields:
+        tuple: (start, end, keyword_count, org_count) for each sentence
+    """
+    if lowered is None:
+        lowered = lower_document(text)
+    if lowered is None:
+        # Offsets into a lowered copy would not line up; score each sentence on its own
+        for s, e in iter_sentence_spans(text):
+            yield (s, e) + count_grant_terms(text[s:e])
+        return
+    
+    hits = GRANT_TERM_REGEX.finditer(lowered)
+    hit = next(hits, None)
+    for s, e in iter_sentence_spans(text):
+        found = set()
+        while hit is not None and hit.start() < e:
+            term = hit.group(1)
+            if hit.start() >= s and hit.start() + len(term) <= e:
+                found.add(term)
+                found.update(_TERM_PREFIXES[term])
+            hit = next(hits, None)
+        yield (s, e) + _sum_term_weights(found)
+
+def score_sentences(text):
+    """
+    Split text into sentences and score each one in a single pass.
+    
+    Sentences are split exactly as ``re.split(r'(?<=[.!?])\s+', text)`` would.
+    
+    Args:
+        text (str): The text to analyze
+        
+    Returns:
+        list: (sentence, keyword_count, org_count) tuples in document order
+    """
+    return [(text[s:e], keyword_count, org_count)
+            for s, e, keyword_count, org_count in score_sentence_spans(text)]
+
+def count_words(text, start=0, end=None, limit=None):
+    """
+    Count the whitespace-separated words of text[start:end] without copying it.
+    
+    Args:
+        text (str): The text
+        start (int): Offset of the first character
+        end (int): Offset after the last character (default: end of text)
+        limit (int): Stop counting once this many words are found
+        
+    Returns:
+        int: Number of words, as len(text[start:end].split()) would give
+    """
+    count = 0
+    for _ in WORD_REGEX.finditer(text, start, len(text) if end is None else end):
+        count += 1
+        if count == limit:
+            break
+    return count
+
 # Financial field patterns
 FINANCIAL_PATTERNS = {
     'salary': [
@@ -56,6 +296,19 @@ FINANCIAL_PATTERNS = {
     ]
 }
 
+# Row labels of budget tables (e.g. SF-424A object class categories) per
+# financial field, normalized as normalize_grant_name normalizes names
+FINANCIAL_TABLE_LABELS = {
+    'salary': ['salary', 'salaries', 'salary and wages', 'salaries and wages', 'personnel',
+               'personnel costs', 'wages'],
+    'indirect': ['indirect', 'indirect costs', 'indirect charges', 'overhead', 'f a costs', 'f a'],
+    'travel': ['travel', 'transportation'],
+    'supplies': ['supplies', 'supply', 'materials', 'materials and supplies'],
+    'fringe': ['fringe', 'fringe benefits', 'benefits'],
+    'equipment': ['equipment', 'capital expenses', 'capital expense'],
+    'other': ['other', 'other costs', 'other direct costs', 'miscellaneous']
+}
+
 # Date patterns
 DATE_PATTERNS = [
     r'(?i)(?:start|beginning|project)\s*date\s*:?\s*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
@@ -72,31 +325,468 @@ PROJECT_PATTERNS = [
     r'(?i)program\s*description\s*:?\s*([^\n]+)'
 ]
 
-# Load or create grant name database
-GRANT_DB_PATH = "grant_database.json"
-grant_database = defaultdict(list)
+# A compiled pattern family: several patterns fused into one named-group regex
+PatternFamily = namedtuple('PatternFamily', ['regex', 'lower_regex', 'members'])
+PatternMember = namedtuple('PatternMember', ['label', 'pattern', 'first_group', 'group_count'])
+PatternHit = namedtuple('PatternHit', ['label', 'start', 'end', 'groups'])
+
+# Characters that re.IGNORECASE folds onto ASCII letters but str.lower() does
+# not (dotless i, long s); scanning a lowered copy is only safe without them.
+_CASE_UNSAFE_CHARS = ('\u0131', '\u017f')
+
+def _lower_pattern(pattern):
+    """Lowercase the literal characters of a pattern, leaving escapes intact."""
+    chars = []
+    escaped = False
+    for char in pattern:
+        chars.append(char if escaped else char.lower())
+        escaped = not escaped and char == '\\'
+    return ''.join(chars)
+
+def _fuse_patterns(bodies):
+    """Join pattern bodies into one regex of optional, named lookaheads."""
+    # The leading lookahead keeps the regex from matching (empty) at offsets
+    # where no pattern applies; the named lookaheads then capture each hit.
+    fused = '(?=' + '|'.join(f'(?:{body})' for body in bodies) + ')'
+    for index, body in enumerate(bodies):
+        fused += f'(?:(?=(?P<p{index}>{body})))?'
+    return fused
+
+def compile_pattern_family(labelled_patterns):
+    """
+    Fuse several case-insensitive patterns into one compiled regex.
+    
+    Each pattern is wrapped in its own optional, named lookahead so a single
+    ``finditer`` over the text reports every position where any pattern
+    matches, including hits that overlap a hit of another pattern.
+    
+    Args:
+        labelled_patterns (list): (label, pattern) pairs; patterns may start with (?i)
+        
+    Returns:
+        PatternFamily: The fused regexes and the per-pattern group layout
+    """
+    bodies = [pattern[4:] if pattern.startswith('(?i)') else pattern
+              for _, pattern in labelled_patterns]
+    regex = re.compile(_fuse_patterns(bodies), re.IGNORECASE)
+    # Case-sensitive twin for scanning a lowercased copy of the text, which
+    # avoids the per-character case folding cost of IGNORECASE.
+    lower_regex = re.compile(_fuse_patterns([_lower_pattern(body) for body in bodies]))
+    
+    members = []
+    for index, (label, pattern) in enumerate(labelled_patterns):
+        members.append(PatternMember(
+            label=label,
+            pattern=pattern,
+            first_group=regex.groupindex[f'p{index}'],
+            group_count=re.compile(pattern).groups
+        ))
+    return PatternFamily(regex, lower_regex, members)
+
+def scan_pattern_family(family, text, pos=0):
+    """
+    Scan text once and collect the hits of every pattern in a family.
+    
+    Hits of a single pattern never overlap each other, exactly as if that
+    pattern had been run on its own with ``re.finditer``.
+    
+    Args:
+        family (PatternFamily): A family built by compile_pattern_family
+        text (str): The text to scan
+        pos (int): Offset in text at which to start scanning
+        
+    Returns:
+        list: One list of PatternHit per member, in pattern order
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text) and not any(c in lowered for c in _CASE_UNSAFE_CHARS):
+        matches = family.lower_regex.finditer(lowered, pos)
+    else:
+        matches = family.regex.finditer(text, pos)
+    
+    members = family.members
+    hits = [[] for _ in members]
+    resume_at = [0] * len(members)
+    for match in matches:
+        position = match.start()
+        for index, member in enumerate(members):
+            if position < resume_at[index]:
+                continue
+            end = match.end(member.first_group)
+            if end == -1:
+                continue
+            groups = []
+            for group in range(member.first_group + 1, member.first_group + 1 + member.group_count):
+                start, stop = match.span(group)
+                # Slice the original text so captured values keep their case
+                groups.append(text[start:stop] if start != -1 else None)
+            hits[index].append(PatternHit(member.label, position, end, tuple(groups)))
+            resume_at[index] = end
+    return hits
+
+def _date_pattern_label(pattern):
+    """Classify a date pattern as 'period', 'start', 'end' or None."""
+    if re.compile(pattern).groups == 2:
+        return 'period'
+    if 'start' in pattern.lower() or 'beginning' in pattern.lower():
+        return 'start'
+    if 'end' in pattern.lower() or 'completion' in pattern.lower():
+        return 'end'
+    return None
 
-def load_grant_database():
-    """Load the grant database if it exists, otherwise create an empty one."""
-    global grant_database
-    if os.path.exists(GRANT_DB_PATH):
+def _project_pattern_label(pattern):
+    """Classify a project pattern as 'title', 'description' or None."""
+    if 'title' in pattern.lower():
+        return 'title'
+    if 'description' in pattern.lower():
+        return 'description'
+    return None
+
+# Compiled pattern registry, built once on first use
+FINANCIAL_FAMILY = LazyObject(lambda: compile_pattern_family(
+    [(field, pattern) for field, patterns in FINANCIAL_PATTERNS.items() for pattern in patterns]
+))
+DATE_FAMILY = LazyObject(lambda: compile_pattern_family(
+    [(_date_pattern_label(pattern), pattern) for pattern in DATE_PATTERNS]
+))
+PROJECT_FAMILY = LazyObject(lambda: compile_pattern_family(
+    [(_project_pattern_label(pattern), pattern) for pattern in PROJECT_PATTERNS]
+))
+
+# Normalized table row label -> financial field
+TABLE_LABEL_FIELDS = {
+    label: field for field, labels in FINANCIAL_TABLE_LABELS.items() for label in labels
+}
+# Matches the longest known label at the start of a normalized row label,
+# after an optional line number or letter such as "1." or "a."
+TABLE_LABEL_REGEX = LazyObject(lambda: re.compile(
+    r'(?:(?:\d+|[a-z]) )?(' + _build_trie_pattern(TABLE_LABEL_FIELDS) + r')(?: |$)'
+))
+# Words a row label may have after the known label, e.g. "Indirect Costs: % Base"
+TABLE_LABEL_MAX_EXTRA_WORDS = 2
+# Dollar amounts, or bare numbers with thousands separators
+TABLE_AMOUNT_REGEX = re.compile(r'\$\s*\d[\d,]*(?:\.\d+)?|\b\d{1,3}(?:,\d{3})+(?:\.\d+)?\b')
+
+# Saved grant names and contexts; grant_database.json from older versions is
+# imported on first use. Every process of a server opens the same SQLite file.
+GRANT_DB_PATH = os.environ.get('GRANT_DB_PATH', "grant_database.sqlite3")
+LEGACY_GRANT_DB_PATH = "grant_database.json"
+# Limit the number of contexts per grant to avoid database bloat
+MAX_CONTEXTS_PER_GRANT = 10
+grant_database = GrantStore(GRANT_DB_PATH, MAX_CONTEXTS_PER_GRANT, LEGACY_GRANT_DB_PATH)
+
+# Confidence added to a candidate whose sentence names a saved grant
+KNOWN_GRANT_BOOST = 0.5
+# Saved names outside these bounds (after normalization) are not matched:
+# very short ones hit everywhere and very long ones are whole sentences
+KNOWN_GRANT_MIN_CHARS = 4
+KNOWN_GRANT_MAX_CHARS = 200
+# Names saved since the main known-grant regex was compiled are matched by a
+# small regex of their own; once more than this many have accumulated, the
+# main regex is recompiled with them in the background
+KNOWN_GRANT_RECENT_MAX = 64
+
+NAME_SEPARATOR_REGEX = re.compile(r'[\W_]+')
+
+def normalize_grant_name(name):
+    """
+    Normalize a grant name for matching.
+    
+    Case is folded and every run of punctuation and whitespace becomes a
+    single space, so "Clean Air Act - Section 103" and "clean air act section
+    103" normalize alike.
+    
+    Args:
+        name (str): The grant name
+        
+    Returns:
+        str: The normalized name
+    """
+    return NAME_SEPARATOR_REGEX.sub(' ', name.lower()).strip()
+
+def _compile_known_names(names):
+    """Compile normalized grant names into one trie regex; None if there are none."""
+    if not names:
+        return None
+    return re.compile(r'(?<![^\W_])(' + _build_trie_pattern(names, r'[\W_]+') + r')(?![^\W_])')
+
+class KnownGrantIndex:
+    """
+    In-memory matcher for the grant names saved in the grant database.
+    
+    Normalized names are compiled into trie-shaped regexes in which a space
+    matches any run of punctuation and whitespace, so a sentence is checked
+    against every saved name in one scan per regex. New names are picked up
+    incrementally: refresh() only reads rows saved since the last refresh,
+    and names saved since the main regex was compiled go into a small regex
+    of their own, so a save costs a recompile of the recent names only. Once
+    more than KNOWN_GRANT_RECENT_MAX are waiting, the main regex is rebuilt
+    with them in a background thread and swapped in. Regexes are compiled
+    outside the lock, so analyses keep matching with the previous ones
+    meanwhile.
+    """
+    
+    def __init__(self, store):
+        self._store = store
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # Held while the first main regex compiles
+        self._last_id = 0
+        self._names = {}  # Normalized name -> first saved spelling
+        self._recent = set()  # Normalized names not in the main regex
+        self._main_regex = None
+        self._recent_regex = None
+        self._generation = 0  # Bumped whenever _recent changes
+        self._recent_generation = 0  # Generation _recent_regex was compiled at
+        self._merging = False
+    
+    def refresh(self):
+        """Load names saved since the last refresh, e.g. by other processes."""
         try:
-            with open(GRANT_DB_PATH, 'r') as f:
-                grant_database = defaultdict(list, json.load(f))
+            names, last_id = self._store.names_since(self._last_id)
         except Exception as e:
-            print(f"Error loading grant database: {e}")
-            grant_database = defaultdict(list)
+            print(f"Error reading grant database: {e}")
+            return
+        with self._lock:
+            for name in names:
+                self._add_locked(name)
+            self._last_id = max(self._last_id, last_id)
+    
+    @property
+    def generation(self):
+        """
+        Number of distinct saved names indexed; changes only when a new name is.
+        
+        Names are never removed, so after refresh() every process that has
+        loaded the same names reports the same generation. Saving a name
+        that is already known (most saves) leaves it unchanged.
+        """
+        with self._lock:
+            return len(self._names)
+    
+    def add(self, grant_name):
+        """
+        Add a newly saved name without re-reading the database.
+        
+        Args:
+            grant_name (str): The grant name
+        """
+        with self._lock:
+            self._add_locked(grant_name)
+    
+    def _add_locked(self, grant_name):
+        normalized = normalize_grant_name(grant_name)
+        if not KNOWN_GRANT_MIN_CHARS <= len(normalized) <= KNOWN_GRANT_MAX_CHARS:
+            return
+        if normalized not in self._names:
+            self._names[normalized] = grant_name
+            self._recent.add(normalized)
+            self._generation += 1
+    
+    def _merge(self, names):
+        """Compile the main regex over names and swap it in (runs unlocked)."""
+        try:
+            regex = _compile_known_names(names)
+        except Exception as e:
+            print(f"Error compiling known grant names: {e}")
+            with self._lock:
+                self._merging = False
+            return
+        with self._lock:
+            self._main_regex = regex
+            self._recent.difference_update(names)
+            self._generation += 1
+            self._merging = False
+    
+    def _compiled(self):
+        """Return the main and recent regexes and the name map, compiling if needed."""
+        with self._lock:
+            first_load = self._main_regex is None and len(self._recent) > KNOWN_GRANT_RECENT_MAX
+        if first_load:
+            # Nothing compiled to match with yet, so the first load is waited for
+            with self._load_lock:
+                with self._lock:
+                    merge = None
+                    if self._main_regex is None and len(self._recent) > KNOWN_GRANT_RECENT_MAX:
+                        self._merging = True
+                        merge = list(self._names)
+                if merge is not None:
+                    self._merge(merge)
+        
+        with self._lock:
+            merge = None
+            if self._main_regex is not None and len(self._recent) > KNOWN_GRANT_RECENT_MAX and not self._merging:
+                self._merging = True
+                merge = list(self._names)
+        if merge is not None:
+            threading.Thread(target=self._merge, args=(merge,), daemon=True).start()
+        
+        with self._lock:
+            if self._recent_generation == self._generation:
+                return self._main_regex, self._recent_regex, self._names
+            generation = self._generation
+            recent = list(self._recent)
+        regex = _compile_known_names(recent)
+        with self._lock:
+            if generation > self._recent_generation:
+                self._recent_regex = regex
+                self._recent_generation = generation
+            return self._main_regex, regex, self._names
+    
+    def find(self, text, start=0, end=None, lowered=None):
+        """
+        Find the saved grants named in a sentence.
+        
+        Args:
+            text (str): The sentence, or a document containing it
+            start (int): Offset where the sentence starts
+            end (int): Offset where the sentence ends (default: end of text)
+            lowered (str): lower_document(text), if the caller already has it
+            
+        Returns:
+            list: Saved names, in the order they appear in the sentence
+        """
+        main_regex, recent_regex, names = self._compiled()
+        regexes = [regex for regex in (main_regex, recent_regex) if regex is not None]
+        if not regexes:
+            return []
+        if lowered is None:
+            lowered = text[start:end].lower()
+            start, end = 0, len(lowered)
+        elif end is None:
+            end = len(lowered)
+        if len(regexes) == 1:
+            return [names[normalize_grant_name(match.group(1))] for match in regexes[0].finditer(lowered, start, end)]
+        
+        # Scan with both regexes as if they were one: the leftmost match wins,
+        # the longest on ties, and scanning resumes after it
+        found = []
+        pending = [None] * len(regexes)
+        pos = start
+        while True:
+            best = None
+            for index, regex in enumerate(regexes):
+                match = pending[index]
+                if match is False:
+                    continue  # No matches left
+                if match is None or match.start() < pos:
+                    match = pending[index] = regex.search(lowered, pos, end) or False
+                    if match is False:
+                        continue
+                if (best is None or match.start() < best.start() or
+                        (match.start() == best.start() and match.end() > best.end())):
+                    best = match
+            if best is None:
+                return found
+            found.append(names[normalize_grant_name(best.group(1))])
+            pos = best.end()
 
-def save_grant_database():
-    """Save the grant database to disk."""
-    try:
-        with open(GRANT_DB_PATH, 'w') as f:
-            json.dump(dict(grant_database), f)
-    except Exception as e:
-        print(f"Error saving grant database: {e}")
+known_grants = KnownGrantIndex(grant_database)
+
+class TextSpanRecord:
+    """
+    Base of result records whose context is a span of the analyzed text.
+    
+    The context is kept as offsets into the text and only copied out when
+    it is read, so records that are replaced by a better one before the
+    result is serialized never copy theirs.
+    """
+    __slots__ = ('text', 'start', 'end')
+    
+    @property
+    def context(self):
+        return self.text[self.start:self.end]
+    
+    def detach(self):
+        """Copy the context out of the text, so the text itself can be freed."""
+        if self.end - self.start != len(self.text):
+            self.text = self.text[self.start:self.end]
+            self.start = 0
+            self.end = len(self.text)
+
+class GrantCandidate(TextSpanRecord):
+    """A potential grant name and the sentence it was found in."""
+    __slots__ = ('name', 'confidence')
+    
+    def __init__(self, name, confidence, text, start, end):
+        self.name = name
+        self.confidence = confidence
+        self.text = text
+        self.start = start
+        self.end = end
+
+# Number of grant candidates reported per document
+TOP_GRANTS = 3
+
+class TopGrantCandidates:
+    """
+    The most confident grant candidates of a document, one per name.
+    
+    Candidates are offered as sentences are scored; only the best k names
+    are kept, in a min-heap whose root is the weakest of them, so selection
+    is O(n log k) and at most k candidate records exist at once. Names are
+    deduplicated by lowercase, keeping each name's most confident sentence
+    (the first one on ties). Equal confidences rank by where each name was
+    first offered, which is the order a full stable sort would give; that
+    first-offer position is the only thing remembered about dropped names.
+    """
+    
+    def __init__(self, k=TOP_GRANTS):
+        self.k = k
+        self._heap = []  # [confidence, -first_offer, name], weakest first
+        self._kept = {}  # Lowercased name -> (heap entry, GrantCandidate)
+        self._first_offer = {}  # Lowercased name -> position of its first offer
+    
+    def offer(self, grant_name, confidence, text, start, end):
+        """
+        Consider the sentence text[start:end] as a candidate for grant_name.
+        
+        Args:
+            grant_name (str): The grant name
+            confidence (float): Confidence of this sentence
+            text (str): Text containing the sentence
+            start (int): Offset where the sentence starts
+            end (int): Offset where the sentence ends
+        """
+        name = grant_name.lower()
+        first_offer = self._first_offer.setdefault(name, len(self._first_offer))
+        kept = self._kept.get(name)
+        if kept is not None:
+            entry, candidate = kept
+            if confidence > candidate.confidence:
+                entry[0] = confidence
+                self._kept[name] = (entry, GrantCandidate(grant_name, confidence, text, start, end))
+                heapq.heapify(self._heap)
+            return
+        
+        entry = [confidence, -first_offer, name]
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            dropped = heapq.heapreplace(self._heap, entry)
+            del self._kept[dropped[2]]
+        else:
+            return
+        self._kept[name] = (entry, GrantCandidate(grant_name, confidence, text, start, end))
+    
+    def candidates(self):
+        """Return the kept candidates, in no particular order."""
+        return [candidate for _, candidate in self._kept.values()]
+    
+    def ranked(self):
+        """Return the kept candidates, most confident first."""
+        entries = sorted(self._heap, reverse=True)
+        return [self._kept[entry[2]][1] for entry in entries]
 
-# Load the database on module import
-load_grant_database()
+class FinancialField(TextSpanRecord):
+    """A financial value and the text around it; confidence is set on assembly."""
+    __slots__ = ('value', 'confidence')
+    
+    def __init__(self, value, text, start, end):
+        self.value = value
+        self.confidence = None
+        self.text = text
+        self.start = start
+        self.end = end
 
 def extract_dates(text):
     """
@@ -114,14 +804,13 @@ def extract_dates(text):
         'yearly_dates': []
     }
     
-    # Try to find dates using patterns
-    for pattern in DATE_PATTERNS:
-        matches = re.finditer(pattern, text)
-        for match in matches:
+    # Try to find dates using patterns, in pattern order
+    for hits in scan_pattern_family(DATE_FAMILY, text):
+        for hit in hits:
             try:
-                if len(match.groups()) == 2:  # Period or budget period pattern
-                    start = parse_date(match.group(1))
-                    end = parse_date(match.group(2))
+                if hit.label == 'period':  # Period or budget period pattern
+                    start = parse_date(hit.groups[0])
+                    end = parse_date(hit.groups[1])
                     if start and end:
                         dates['start_date'] = start
                         dates['end_date'] = end
@@ -129,12 +818,11 @@ def extract_dates(text):
                         dates['yearly_dates'] = calculate_yearly_dates(start, end)
                         return dates
                 else:  # Single date pattern
-                    date_str = match.group(1)
-                    parsed_date = parse_date(date_str)
+                    parsed_date = parse_date(hit.groups[0])
                     if parsed_date:
-                        if 'start' in pattern.lower() or 'beginning' in pattern.lower():
+                        if hit.label == 'start':
                             dates['start_date'] = parsed_date
-                        elif 'end' in pattern.lower() or 'completion' in pattern.lower():
+                        elif hit.label == 'end':
                             dates['end_date'] = parsed_date
             except Exception:
                 continue
@@ -173,6 +861,7 @@ def calculate_yearly_dates(start_date, end_date):
                 'start': current_date,
                 'end': end_date
             })
+            break
         else:
             yearly_dates.append({
                 'start': current_date,
@@ -194,27 +883,64 @@ def extract_financial_fields(text):
     """
     financial_data = {}
     
-    for field, patterns in FINANCIAL_PATTERNS.items():
-        values = []
-        for pattern in patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                try:
-                    value = float(match.group(1).replace(',', ''))
-                    values.append({
-                        'value': value,
-                        'context': text[max(0, match.start() - 50):min(len(text), match.end() + 50)]
-                    })
-                except (ValueError, IndexError):
-                    continue
-        
-        if values:
-            # Sort by value and take the highest
-            values.sort(key=lambda x: x['value'], reverse=True)
-            financial_data[field] = values[0]
+    # Group hits by field, keeping pattern order within each field
+    field_hits = defaultdict(list)
+    for hits in scan_pattern_family(FINANCIAL_FAMILY, text):
+        for hit in hits:
+            field_hits[hit.label].append(hit)
+    
+    for field in FINANCIAL_PATTERNS:
+        best = None
+        for hit in field_hits.get(field, []):
+            try:
+                value = float(hit.groups[0].replace(',', ''))
+            except (ValueError, IndexError):
+                continue
+            # The highest value wins, the first one on ties
+            if best is None or value > best.value:
+                best = FinancialField(value, text, max(0, hit.start - 50), min(len(text), hit.end + 50))
+        
+        if best is not None:
+            financial_data[field] = best
     
     return financial_data
 
+def extract_financial_fields_from_rows(page_rows):
+    """
+    Extract financial information from budget table rows.
+    
+    Each row is split at its first amount into a label and its amounts, and
+    the label is mapped to a field with one TABLE_LABEL_REGEX match. The
+    rightmost amount is taken, which is the total column of multi-column
+    tables. As in extract_financial_fields, the highest value per field wins.
+    
+    Args:
+        page_rows (list): Row texts per page, from pdf_extractor.extract_pdf_document
+        
+    Returns:
+        dict: Dictionary containing financial fields and their values
+    """
+    found = {}
+    for rows in page_rows:
+        for row in rows:
+            amounts = list(TABLE_AMOUNT_REGEX.finditer(row))
+            if not amounts:
+                continue
+            label = normalize_grant_name(row[:amounts[0].start()])
+            match = TABLE_LABEL_REGEX.match(label)
+            # A label followed by more than a couple of words is running text
+            if not match or len(label[match.end():].split()) > TABLE_LABEL_MAX_EXTRA_WORDS:
+                continue
+            try:
+                value = float(re.sub(r'[$,\s]', '', amounts[-1].group()))
+            except ValueError:
+                continue
+            field = TABLE_LABEL_FIELDS[match.group(1)]
+            if field not in found or value > found[field].value:
+                found[field] = FinancialField(value, row, 0, len(row))
+    # Keep the field order of FINANCIAL_PATTERNS
+    return {field: found[field] for field in FINANCIAL_PATTERNS if field in found}
+
 def extract_project_info(text):
     """
     Extract project/program information from text.
@@ -230,23 +956,27 @@ def extract_project_info(text):
         'description': None
     }
     
-    for pattern in PROJECT_PATTERNS:
-        match = re.search(pattern, text)
-        if match:
-            info = match.group(1).strip()
-            if 'title' in pattern.lower():
-                project_info['title'] = info
-            elif 'description' in pattern.lower():
-                project_info['description'] = info
+    for hits in scan_pattern_family(PROJECT_FAMILY, text):
+        if hits:
+            # Only the first hit of each pattern is used
+            hit = hits[0]
+            info = hit.groups[0].strip()
+            if hit.label in project_info:
+                project_info[hit.label] = info
     
     return project_info
 
-def identify_potential_grants(text):
+def identify_potential_grants(text, table_rows=None, grant_names=None):
     """
     Identify potential grant names and extract additional information from text.
     
     Args:
         text (str): The text to analyze
+        table_rows (list): Optional row texts per page from
+            pdf_extractor.extract_pdf_document; financial fields found in
+            budget tables take precedence over matches in the running text
+        grant_names (dict): Optional memo of sentence -> extracted grant
+            name; names found in it are reused, new ones are added to it
         
     Returns:
         dict: Dictionary containing grant information and extracted fields
@@ -260,48 +990,80 @@ def identify_potential_grants(text):
         }
     
     # Extract basic grant information
-    grants = []
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    known_grants.refresh()
+    top_grants = TopGrantCandidates()
+    with timed('grant_scoring'):
+        _collect_grant_candidates(text, top_grants, grant_names)
     
-    for sentence in sentences:
-        if len(sentence.split()) < 3:
-            continue
+    # Extract additional information
+    with timed('dates'):
+        dates = extract_dates(text)
+    with timed('financial'):
+        financial = extract_financial_fields(text)
+    if table_rows:
+        financial = _merge_table_financial(financial, table_rows)
+    with timed('project'):
+        project = extract_project_info(text)
+    
+    return _assemble_result(top_grants, dates, financial, project)
+
+def _merge_table_financial(financial, table_rows):
+    """Let financial fields found in budget table rows override those from the text."""
+    with timed('financial_tables'):
+        table_financial = extract_financial_fields_from_rows(table_rows)
+    if not table_financial:
+        return financial
+    return {
+        field: table_financial.get(field, financial.get(field))
+        for field in FINANCIAL_PATTERNS if field in table_financial or field in financial
+    }
+
+def _collect_grant_candidates(text, top_grants, grant_names=None):
+    """
+    Score the sentences of text and offer grant candidates to top_grants.
+    
+    Args:
+        text (str): Text made of whole sentences
+        top_grants (TopGrantCandidates): The best candidates so far
+        grant_names (dict): Optional memo of sentence -> extracted grant name
+    """
+    # Sentences are handled as spans over text and one lowercased copy of it;
+    # a sentence is only copied out when it becomes a candidate's context
+    lowered = lower_document(text)
+    for start, end, keyword_count, org_count in score_sentence_spans(text, lowered):
+        confidence = min((keyword_count * 0.2) + (org_count * 0.3), 1.0)
+        
+        # Grants saved with /save_grant are recognized by name and boosted
+        for grant_name in known_grants.find(text, start, end, lowered):
+            top_grants.offer(grant_name, min(confidence + KNOWN_GRANT_BOOST, 1.0), text, start, end)
         
-        keyword_count = sum(1 for keyword in GRANT_KEYWORDS if keyword.lower() in sentence.lower())
-        org_count = sum(1 for org in GRANT_ORGANIZATIONS if org.lower() in sentence.lower())
+        if count_words(text, start, end, limit=3) < 3:
+            continue
         
         if keyword_count > 0 or org_count > 0:
-            confidence = min((keyword_count * 0.2) + (org_count * 0.3), 1.0)
-            grant_name = extract_grant_name_from_sentence(sentence)
+            if grant_names is None:
+                grant_name = extract_grant_name_from_span(text, start, end)
+            else:
+                # Name extraction only depends on the sentence, so it is
+                # memoized across uploads of amended documents
+                sentence = text[start:end]
+                grant_name = grant_names.get(sentence)
+                if grant_name is None:
+                    grant_name = grant_names[sentence] = extract_grant_name_from_span(text, start, end)
             
             if grant_name:
-                grants.append({
-                    'name': grant_name,
-                    'confidence': confidence,
-                    'context': sentence
-                })
-    
-    # Remove duplicates and sort by confidence
-    unique_grants = {}
-    for grant in grants:
-        name = grant['name'].lower()
-        if name not in unique_grants or grant['confidence'] > unique_grants[name]['confidence']:
-            unique_grants[name] = grant
-    
-    # Sort by confidence and limit to top 3
-    sorted_grants = sorted(unique_grants.values(), key=lambda x: x['confidence'], reverse=True)[:3]
-    
-    # Extract additional information with confidence scores
-    dates = extract_dates(text)
-    financial = extract_financial_fields(text)
-    project = extract_project_info(text)
+                top_grants.offer(grant_name, confidence, text, start, end)
+
+def _assemble_result(top_grants, dates, financial, project):
+    """Rank grant candidates and attach confidence scores to extracted fields."""
+    sorted_grants = top_grants.ranked()
     
     # Add confidence scores to dates
     dates['confidence'] = calculate_dates_confidence(dates)
     
     # Add confidence scores to financial fields
     for field, data in financial.items():
-        data['confidence'] = calculate_financial_confidence(data['value'], data['context'])
+        data.confidence = calculate_financial_confidence(data.value, data.context)
     
     # Add confidence scores to project info
     project['confidence'] = calculate_project_confidence(project)
@@ -313,6 +1075,339 @@ def identify_potential_grants(text):
         'project': project
     }
 
+# How far (in characters) a pattern hit must end before the last non-blank
+# character received so far before the streaming analyzer treats it as final.
+# It covers the 50-character financial context and any look-ahead a pattern
+# needs to decide where it stops.
+STREAM_SETTLE_MARGIN = 512
+
+class StreamingGrantAnalyzer:
+    """
+    Incremental version of identify_potential_grants for page streams.
+    
+    Pages are fed one at a time and joined exactly as extract_text_from_pdf
+    joins them. Only the unfinished sentence and the last few hundred
+    characters are kept between pages, so memory is bounded by page size
+    rather than document size. Calling finish() returns the same result as
+    identify_potential_grants on the full text.
+    """
+    
+    def __init__(self):
+        known_grants.refresh()
+        self._buffer = ''
+        self._buffer_start = 0  # Absolute document offset of _buffer[0]
+        self._sentence_start = 0  # Start of the first unscored sentence
+        self._scan_from = 0  # Pattern hits before this offset are settled
+        self._started = False
+        
+        self._top_grants = TopGrantCandidates()
+        # Per family and pattern: absolute offset where the next hit may start
+        self._resume_at = {
+            'financial': [0] * len(FINANCIAL_FAMILY.members),
+            'date': [0] * len(DATE_FAMILY.members),
+            'project': [0] * len(PROJECT_FAMILY.members)
+        }
+        self._periods = {}  # Date member index -> first parsed (start, end)
+        self._single_dates = {'start': None, 'end': None}
+        self._financial = {}  # Field -> (value, member index, position, context)
+        self._project = {}  # Project member index -> first hit text
+    
+    def feed(self, page_text):
+        """
+        Add the text of the next page.
+        
+        Args:
+            page_text (str): Text extracted from one page
+        """
+        chunk = (page_text or '') + "\n\n"
+        if not self._started:
+            # The joined document is stripped, so drop leading whitespace
+            chunk = chunk.lstrip()
+            if not chunk:
+                return
+            self._started = True
+        self._buffer += chunk
+        with timed('stream_analyze'):
+            self._process(final=False)
+    
+    def finish(self, table_rows=None):
+        """
+        Flush the remaining text and return the analysis result.
+        
+        Args:
+            table_rows (list): Optional row texts of the fed pages, as
+                identify_potential_grants takes them
+            
+        Returns:
+            dict: Dictionary containing grant information and extracted fields
+        """
+        if not self._started:
+            return {
+                'grants': [],
+                'dates': {},
+                'financial': {},
+                'project': {}
+            }
+        self._buffer = self._buffer.rstrip()
+        with timed('stream_analyze'):
+            self._process(final=True)
+        
+        dates = {
+            'start_date': self._single_dates['start'],
+            'end_date': self._single_dates['end'],
+            'yearly_dates': []
+        }
+        for index in sorted(self._periods):
+            start, end = self._periods[index]
+            dates['start_date'] = start
+            dates['end_date'] = end
+            dates['yearly_dates'] = calculate_yearly_dates(start, end)
+            break
+        
+        financial = {
+            field: FinancialField(best[0], best[3], 0, len(best[3]))
+            for field, best in self._financial.items()
+        }
+        # Keep the field order of FINANCIAL_PATTERNS, as extract_financial_fields does
+        financial = {field: financial[field] for field in FINANCIAL_PATTERNS if field in financial}
+        if table_rows:
+            financial = _merge_table_financial(financial, table_rows)
+        
+        project = {'title': None, 'description': None}
+        for index in sorted(self._project):
+            label = PROJECT_FAMILY.members[index].label
+            if label in project:
+                project[label] = self._project[index]
+        
+        return _assemble_result(self._top_grants, dates, financial, project)
+    
+    def filled_sections(self, min_confidence):
+        """
+        Report which result sections are already settled well enough.
+        
+        Args:
+            min_confidence (float): Confidence each of the top 3 grant
+                candidates must reach for the grants to count as filled
+            
+        Returns:
+            set: Names among 'grants', 'dates' and 'project' that are filled
+        """
+        filled = set()
+        confident = [grant for grant in self._top_grants.candidates() if grant.confidence >= min_confidence]
+        if len(confident) >= TOP_GRANTS:
+            filled.add('grants')
+        if self._periods or (self._single_dates['start'] and self._single_dates['end']):
+            filled.add('dates')
+        if any(PROJECT_FAMILY.members[index].label == 'title' for index in self._project):
+            filled.add('project')
+        return filled
+    
+    def _process(self, final):
+        """Score finished sentences and settle pattern hits in the buffer."""
+        buffer = self._buffer
+        
+        # Sentences: a boundary is final once non-blank text follows it
+        local_start = self._sentence_start - self._buffer_start
+        if final:
+            _collect_grant_candidates(buffer[local_start:], self._top_grants)
+        else:
+            last = None
+            for boundary in SENTENCE_BOUNDARY_REGEX.finditer(buffer, local_start):
+                if boundary.end() < len(buffer):
+                    last = boundary
+            if last is not None:
+                _collect_grant_candidates(buffer[local_start:last.start()], self._top_grants)
+                self._sentence_start = self._buffer_start + last.end()
+                # Candidates point into the scored text; keep only their sentences
+                for candidate in self._top_grants.candidates():
+                    candidate.detach()
+        
+        # Pattern families
+        if final:
+            limit = len(buffer)
+        else:
+            limit = len(buffer.rstrip()) - STREAM_SETTLE_MARGIN
+        scan_from = self._scan_from - self._buffer_start
+        if scan_from < limit:
+            next_scan_from = limit
+            for name, family, settle in (('financial', FINANCIAL_FAMILY, self._settle_financial),
+                                         ('date', DATE_FAMILY, self._settle_date),
+                                         ('project', PROJECT_FAMILY, self._settle_project)):
+                resume_at = self._resume_at[name]
+                for index, hits in enumerate(scan_pattern_family(family, buffer, scan_from)):
+                    for hit in hits:
+                        position = self._buffer_start + hit.start
+                        if position < resume_at[index]:
+                            continue
+                        if hit.end > limit:
+                            # Later text could still change this hit; retry next time
+                            next_scan_from = min(next_scan_from, hit.start)
+                            break
+                        settle(index, hit, position, buffer)
+                        resume_at[index] = self._buffer_start + hit.end
+            self._scan_from = self._buffer_start + next_scan_from
+        
+        # Drop text that is no longer needed, keeping context for later hits
+        keep_from = min(self._sentence_start, self._scan_from - 50) - self._buffer_start
+        if keep_from > 0:
+            self._buffer = buffer[keep_from:]
+            self._buffer_start += keep_from
+    
+    def _settle_financial(self, index, hit, position, buffer):
+        """Keep the highest value per field, earliest pattern then position on ties."""
+        try:
+            value = float(hit.groups[0].replace(',', ''))
+        except (ValueError, IndexError):
+            return
+        field = hit.label
+        best = self._financial.get(field)
+        if best is None or value > best[0] or (value == best[0] and (index, position) < (best[1], best[2])):
+            context = buffer[max(0, hit.start - 50):min(len(buffer), hit.end + 50)]
+            self._financial[field] = (value, index, position, context)
+    
+    def _settle_date(self, index, hit, position, buffer):
+        """Record the first full period per pattern and the last single dates."""
+        if hit.label == 'period':
+            if index not in self._periods:
+                start = parse_date(hit.groups[0])
+                end = parse_date(hit.groups[1])
+                if start and end:
+                    self._periods[index] = (start, end)
+        elif hit.label in self._single_dates:
+            parsed_date = parse_date(hit.groups[0])
+            if parsed_date:
+                self._single_dates[hit.label] = parsed_date
+    
+    def _settle_project(self, index, hit, position, buffer):
+        """Record the first hit of each project pattern."""
+        if index not in self._project:
+            self._project[index] = hit.groups[0].strip()
+
+def identify_potential_grants_from_pages(pages):
+    """
+    Identify potential grants from an iterable of page texts.
+    
+    Args:
+        pages (iterable): Page texts, e.g. from pdf_extractor.iter_pdf_pages
+        
+    Returns:
+        dict: Dictionary containing grant information and extracted fields
+    """
+    analyzer = StreamingGrantAnalyzer()
+    for page_text in pages:
+        analyzer.feed(page_text)
+    return analyzer.finish()
+
+# Result sections that budgeted analysis can report as filled early
+BUDGET_SECTIONS = ('grants', 'dates', 'project')
+
+def identify_potential_grants_budgeted(pages, max_pages=None, max_seconds=None, target_confidence=None,
+                                      total_pages=None):
+    """
+    Identify potential grants from a page stream, stopping early on a budget.
+    
+    Pages are analyzed as they arrive, so pages past the stopping point are
+    never extracted when pages is a lazy iterator such as
+    pdf_extractor.iter_pdf_pages. Analysis stops after max_pages pages, once
+    max_seconds have passed, or once the top 3 grants reach
+    target_confidence and a period and project title have been found; the
+    first page is analyzed whatever the budget.
+    
+    Args:
+        pages (iterable): (text, rows) pairs, e.g. from
+            pdf_extractor.iter_pdf_pages(..., layout=True)
+        max_pages (int): Maximum number of pages to analyze
+        max_seconds (float): Wall-clock time after which no further page is read
+        target_confidence (float): Stop once every section is filled at this
+            grant confidence
+        total_pages (int): Number of pages in the document, if known; without
+            it one more page is read to tell whether the document has ended
+        
+    Returns:
+        tuple: (result, truncated) where truncated is None if every page was
+        analyzed, otherwise a dict with the 'reason' analysis stopped, the
+        'pages_analyzed', and the 'stages' whose output may be incomplete
+    """
+    started = time.perf_counter()
+    analyzer = StreamingGrantAnalyzer()
+    table_rows = []
+    reason = None
+    pages = iter(pages)
+    while True:
+        # The first page is always analyzed: compiling the patterns and
+        # loading the saved grants can use up a small time budget on their own
+        if table_rows:
+            if max_pages is not None and len(table_rows) >= max_pages:
+                reason = 'max_pages'
+            elif max_seconds is not None and time.perf_counter() - started >= max_seconds:
+                reason = 'max_time'
+            elif (target_confidence is not None and
+                    len(analyzer.filled_sections(target_confidence)) == len(BUDGET_SECTIONS)):
+                reason = 'target_confidence'
+        if reason:
+            # A budget that runs out on the last page truncates nothing
+            if total_pages is not None:
+                if len(table_rows) >= total_pages:
+                    reason = None
+            elif next(pages, None) is None:
+                reason = None
+            break
+        
+        page = next(pages, None)
+        if page is None:
+            break
+        page_text, rows = page
+        analyzer.feed(page_text)
+        table_rows.append(rows)
+    
+    result = analyzer.finish(table_rows)
+    
+    truncated = None
+    if reason:
+        filled = analyzer.filled_sections(1.0 if target_confidence is None else target_confidence)
+        truncated = {
+            'reason': reason,
+            'pages_analyzed': len(table_rows),
+            # Financial fields have no completeness test: a later budget table may supersede them
+            'stages': ['extract'] + [section for section in BUDGET_SECTIONS if section not in filled] + ['financial']
+        }
+    return result, truncated
+
+def serialize_result(result):
+    """
+    Build the JSON-ready form of an analysis result.
+    
+    Result records are turned into plain dicts and datetimes into
+    YYYY-MM-DD strings in one pass; the result itself is left unchanged.
+    
+    Args:
+        result (dict): Output of identify_potential_grants
+        
+    Returns:
+        dict: The result as served by /upload and stored in the caches
+    """
+    dates = dict(result['dates'])
+    for key in ('start_date', 'end_date'):
+        if dates.get(key):
+            dates[key] = dates[key].strftime('%Y-%m-%d')
+    dates['yearly_dates'] = [
+        {'start': period['start'].strftime('%Y-%m-%d'), 'end': period['end'].strftime('%Y-%m-%d')}
+        for period in dates.get('yearly_dates', [])
+    ]
+    
+    return {
+        'grants': [
+            {'name': grant.name, 'confidence': grant.confidence, 'context': grant.context}
+            for grant in result['grants']
+        ],
+        'dates': dates,
+        'financial': {
+            field: {'value': data.value, 'context': data.context, 'confidence': data.confidence}
+            for field, data in result['financial'].items()
+        },
+        'project': dict(result['project'])
+    }
+
 def calculate_dates_confidence(dates):
     """Calculate confidence score for dates extraction."""
     confidence = 0.0
@@ -377,43 +1472,76 @@ def calculate_project_confidence(project):
     
     return confidence / max(factors, 1)
 
+# Patterns like "X Grant for Y" or "X Program for Y", in order of preference
+GRANT_NAME_PATTERNS = [LazyObject(lambda pattern=pattern: re.compile(pattern)) for pattern in (
+    r'(?i)([A-Z][a-zA-Z\s,&\'-]+(?:\([^)]+\))?)\s+(?:grant|award|program|project|initiative|scheme)\s+(?:for|to|in|of)\s+[A-Z][a-zA-Z\s,&\'-]+(?:\([^)]+\))?',
+    r'(?i)(?:grant|award|program|project|initiative|scheme)\s+(?:for|to|in|of)\s+([A-Z][a-zA-Z\s,&\'-]+(?:\([^)]+\))?)',
+    r'(?i)([A-Z][a-zA-Z\s,&\'-]+(?:\([^)]+\))?)\s+(?:RFA|RFP|NOFA|NOFO|FOA|BAA|RFI)\s+[A-Z0-9-]+(?:\s*[-:]\s*[A-Z][a-zA-Z\s,&\'-]+)?',
+    r'(?i)(?:RFA|RFP|NOFA|NOFO|FOA|BAA|RFI)\s+[A-Z0-9-]+(?:\s*[-:]\s*)([A-Z][a-zA-Z\s,&\'-]+(?:\([^)]+\))?)'
+)]
+
 def extract_grant_name_from_sentence(sentence):
     """Extract a potential grant name from a sentence using heuristics."""
-    # Look for patterns like "X Grant for Y" or "X Program for Y"
-    patterns = [
-        r'(?i)([A-Z][a-zA-Z\s,&\'-]+(?:\([^)]+\))?)\s+(?:grant|award|program|project|initiative|scheme)\s+(?:for|to|in|of)\s+[A-Z][a-zA-Z\s,&\'-]+(?:\([^)]+\))?',
-        r'(?i)(?:grant|award|program|project|initiative|scheme)\s+(?:for|to|in|of)\s+([A-Z][a-zA-Z\s,&\'-]+(?:\([^)]+\))?)',
-        r'(?i)([A-Z][a-zA-Z\s,&\'-]+(?:\([^)]+\))?)\s+(?:RFA|RFP|NOFA|NOFO|FOA|BAA|RFI)\s+[A-Z0-9-]+(?:\s*[-:]\s*[A-Z][a-zA-Z\s,&\'-]+)?',
-        r'(?i)(?:RFA|RFP|NOFA|NOFO|FOA|BAA|RFI)\s+[A-Z0-9-]+(?:\s*[-:]\s*)([A-Z][a-zA-Z\s,&\'-]+(?:\([^)]+\))?)'
-    ]
+    return extract_grant_name_from_span(sentence, 0, len(sentence))
+
+def extract_grant_name_from_span(text, start, end):
+    """
+    Extract a potential grant name from the sentence text[start:end].
+    
+    Works on the span in place; only the returned name is copied.
     
-    for pattern in patterns:
-        match = re.search(pattern, sentence)
+    Args:
+        text (str): Document containing the sentence
+        start (int): Offset where the sentence starts
+        end (int): Offset where the sentence ends
+        
+    Returns:
+        str: The grant name
+    """
+    # The patterns have no anchors or lookbehinds, so searching the span
+    # finds the same match as searching a copy of the sentence
+    for regex in GRANT_NAME_PATTERNS:
+        match = regex.search(text, start, end)
         if match:
             return match.group(1).strip()
     
-    # If no pattern matches, look for capitalized phrases
-    words = sentence.split()
-    capitalized_phrases = []
+    # If no pattern matches, look for capitalized phrases, kept as word spans
+    best_phrase = None
+    best_length = 0
     current_phrase = []
+    current_length = -1
     
-    for word in words:
-        if word and word[0].isupper():
-            current_phrase.append(word)
+    for word in WORD_REGEX.finditer(text, start, end):
+        if text[word.start()].isupper():
+            current_phrase.append(word.span())
+            current_length += 1 + word.end() - word.start()
         else:
-            if len(current_phrase) > 1:  # Only keep phrases with at least 2 words
-                capitalized_phrases.append(' '.join(current_phrase))
+            # Only keep phrases with at least 2 words; the first longest wins
+            if len(current_phrase) > 1 and current_length > best_length:
+                best_phrase, best_length = current_phrase, current_length
             current_phrase = []
+            current_length = -1
     
-    if len(current_phrase) > 1:
-        capitalized_phrases.append(' '.join(current_phrase))
+    if len(current_phrase) > 1 and current_length > best_length:
+        best_phrase = current_phrase
     
     # Return the longest capitalized phrase
-    if capitalized_phrases:
-        return max(capitalized_phrases, key=len)
+    if best_phrase:
+        return ' '.join(text[s:e] for s, e in best_phrase)
     
     # If all else fails, return the sentence itself
-    return sentence.strip()
+    return text[start:end].strip()
+
+def precompile_analyzer():
+    """
+    Compile every pattern the analyzer uses now instead of on first use.
+    
+    A server that forks its workers calls this once before forking, so the
+    workers share the compiled patterns instead of each compiling them.
+    """
+    lazy_objects = [GRANT_TERM_REGEX, FINANCIAL_FAMILY, DATE_FAMILY, PROJECT_FAMILY, TABLE_LABEL_REGEX]
+    for lazy_object in lazy_objects + GRANT_NAME_PATTERNS:
+        lazy_object.resolve()
 
 def add_to_database(grant_name, context):
     """
@@ -427,11 +1555,9 @@ def add_to_database(grant_name, context):
         return
     
     grant_name = grant_name.strip()
-    grant_database[grant_name].append(context)
-    
-    # Limit the number of contexts per grant to avoid database bloat
-    if len(grant_database[grant_name]) > 10:
-        grant_database[grant_name] = grant_database[grant_name][-10:]
-    
-    # Save the updated database
-    save_grant_database() 
\ No newline at end of file
+    try:
+        grant_database.add(grant_name, context)
+    except Exception as e:
+        print(f"Error saving grant database: {e}")
+        return
+    known_grants.add(grant_name)
@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import threading
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS grant_contexts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    grant_name TEXT NOT NULL,
+    context TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS grant_contexts_name ON grant_contexts (grant_name, id);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+class GrantStore:
+    """
+    SQLite-backed store of saved grant names and their contexts.
+
+    The database runs in WAL mode, so readers never block the writer and
+    several processes can share one file. Each context is inserted in its own
+    short transaction that also trims the grant to its newest max_contexts
+    entries; both statements go through the (grant_name, id) index, so the
+    cost of a save does not grow with the size of the database.
+
+    A grant_database.json file left by older versions is imported once, the
+    first time the store is opened.
+    """
+
+    def __init__(self, db_path, max_contexts=10, legacy_json_path=None):
+        self.db_path = db_path
+        self.max_contexts = max_contexts
+        self.legacy_json_path = legacy_json_path
+        # sqlite3 connections cannot be shared across threads
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        """Return this thread's connection, creating the schema on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly below
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(_SCHEMA)
+                self._migrate_legacy_json(conn)
+                self._initialized = True
+        return conn
+
+    def _has_data(self):
+        """
+        Whether reads have anything to find: the database or a JSON file to import.
+
+        Readers check this first, so looking up names before anything was
+        saved does not create an empty database file.
+        """
+        if self._initialized or os.path.exists(self.db_path):
+            return True
+        return bool(self.legacy_json_path) and os.path.exists(self.legacy_json_path)
+
+    def _migrate_legacy_json(self, conn):
+        """Import the old JSON database into an empty store, once."""
+        if not self.legacy_json_path or not os.path.exists(self.legacy_json_path):
+            return
+        # IMMEDIATE takes the write lock up front, so only one process migrates
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            done = conn.execute(
+                "SELECT 1 FROM store_meta WHERE key = 'legacy_json_migrated'"
+            ).fetchone()
+            if not done:
+                try:
+                    with open(self.legacy_json_path, 'r') as f:
+                        legacy = json.load(f)
+                except Exception as e:
+                    print(f"Error loading grant database: {e}")
+                    legacy = {}
+                for grant_name, contexts in legacy.items():
+                    conn.executemany(
+                        'INSERT INTO grant_contexts (grant_name, context) VALUES (?, ?)',
+                        [(grant_name, context) for context in contexts[-self.max_contexts:]]
+                    )
+                conn.execute(
+                    "INSERT INTO store_meta (key, value) VALUES ('legacy_json_migrated', ?)",
+                    (self.legacy_json_path,)
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def add(self, grant_name, context):
+        """
+        Save a context for a grant, keeping only the newest max_contexts.
+
+        Args:
+            grant_name (str): The grant name
+            context (str): The context in which the grant was found
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT INTO grant_contexts (grant_name, context) VALUES (?, ?)',
+                (grant_name, context)
+            )
+            conn.execute(
+                """
+                DELETE FROM grant_contexts
+                WHERE grant_name = ? AND id < (
+                    SELECT id FROM grant_contexts WHERE grant_name = ?
+                    ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+                """,
+                (grant_name, grant_name, self.max_contexts - 1)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def contexts(self, grant_name):
+        """
+        Look up the saved contexts of a grant.
+
+        Args:
+            grant_name (str): The grant name
+
+        Returns:
+            list: Contexts, oldest first (empty if the grant is unknown)
+        """
+        if not self._has_data():
+            return []
+        rows = self._connect().execute(
+            'SELECT context FROM grant_contexts WHERE grant_name = ? ORDER BY id',
+            (grant_name,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def __contains__(self, grant_name):
+        if not self._has_data():
+            return False
+        row = self._connect().execute(
+            'SELECT 1 FROM grant_contexts WHERE grant_name = ? LIMIT 1',
+            (grant_name,)
+        ).fetchone()
+        return row is not None
+
+    def names(self):
+        """
+        List every saved grant name.
+
+        Returns:
+            list: Distinct grant names, sorted
+        """
+        if not self._has_data():
+            return []
+        rows = self._connect().execute(
+            'SELECT DISTINCT grant_name FROM grant_contexts ORDER BY grant_name'
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def names_since(self, last_id=0):
+        """
+        List grant names saved after a given row, for incremental readers.
+
+        Args:
+            last_id (int): Highest row id the caller has already seen
+
+        Returns:
+            tuple: (names, new_last_id), names in the order they were saved
+        """
+        if not self._has_data():
+            return [], last_id
+        rows = self._connect().execute(
+            'SELECT id, grant_name FROM grant_contexts WHERE id > ? ORDER BY id',
+            (last_id,)
+        ).fetchall()
+        if not rows:
+            return [], last_id
+        return [row[1] for row in rows], rows[-1][0]
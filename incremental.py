@@ -0,0 +1,113 @@
+from bisect import bisect_right
+
+from pdf_extractor import extract_pdf_pages, fingerprint_pdf_pages, needs_ocr, ocr_rows
+from grant_identifier import identify_potential_grants, iter_sentence_spans
+from metrics import DOCUMENT_PAGES, timed
+
+def analyze_document_incremental(data, page_cache, workers=1, progress=None, ocr=None):
+    """
+    Extract and analyze a PDF, reusing the work done on its unchanged pages.
+    
+    Pages are fingerprinted first; pages seen before (in this or an earlier
+    version of the document) come from page_cache, and only the rest are
+    extracted. The grant names extracted from sentences on cached pages are
+    reused as well. Keyword scoring and the financial, date and project
+    scans still run over the whole text, since their matches can cross page
+    boundaries, so the result is the same as a full analysis.
+    
+    With ocr set, pages without a text layer are read by OCR, whose own
+    cache makes scanned pages cheap to read again.
+    
+    Args:
+        data (str or bytes): Path to the PDF file, or the file contents
+        page_cache (PageCache): Cache of per-page partial results
+        workers (int): Number of processes to extract changed pages with
+        progress (callable): Optional callback called with the number of
+            pages extracted so far
+        ocr (PageOcr): Optional OCR fallback for pages without a text layer
+        
+    Returns:
+        tuple: (text, result, pages_reused), where result is the output of
+        identify_potential_grants; (None, None, 0) if extraction failed
+    """
+    try:
+        with timed('page_fingerprint'):
+            fingerprints = fingerprint_pdf_pages(data)
+        keys = [page_cache.key_for_page(fingerprint) for fingerprint in fingerprints]
+        
+        with timed('page_cache_lookup'):
+            cached = {}
+            for page_num, key in enumerate(keys):
+                entry = page_cache.get(key)
+                if entry:
+                    cached[page_num] = entry
+        if progress and cached:
+            progress(len(cached))
+        
+        missing = [page_num for page_num in range(len(keys)) if page_num not in cached]
+        extracted = extract_pdf_pages(
+            data, missing, workers=workers,
+            progress=(lambda pages: progress(len(cached) + pages)) if progress else None
+        )
+        DOCUMENT_PAGES.observe('pdf', len(keys))
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+        return None, None, 0
+    
+    texts = []
+    table_rows = []
+    grant_names = {}
+    for page_num in range(len(keys)):
+        if page_num in cached:
+            entry = cached[page_num]
+            texts.append(entry['text'])
+            table_rows.append(entry['rows'])
+            grant_names.update(entry['grant_names'])
+        else:
+            text, rows = extracted[page_num]
+            texts.append(text)
+            table_rows.append(rows)
+    
+    # Scanned pages have no text layer; read them with OCR instead
+    if ocr is not None:
+        scanned = [page_num for page_num, page_text in enumerate(texts) if needs_ocr(page_text)]
+        for page_num, page_text in ocr.recognize(data, scanned).items():
+            texts[page_num] = page_text
+            table_rows[page_num] = ocr_rows(page_text)
+    
+    # Joined exactly as pdf_extractor.extract_pdf_document joins pages
+    joined = "\n\n".join(texts)
+    text = joined.strip()
+    if not text:
+        return None, None, len(cached)
+    
+    with timed('analyze'):
+        result = identify_potential_grants(text, table_rows, grant_names)
+    
+    if missing:
+        with timed('page_cache_store'):
+            _store_pages(page_cache, keys, texts, table_rows, missing, joined, text, grant_names)
+    return text, result, len(cached)
+
+def _store_pages(page_cache, keys, texts, table_rows, pages, joined, text, grant_names):
+    """Cache newly extracted pages with the grant names of the sentences starting on them."""
+    # Offset in text where each page starts, after the join and strip
+    shift = len(joined) - len(joined.lstrip())
+    page_starts = []
+    offset = -shift
+    for page_text in texts:
+        page_starts.append(offset)
+        offset += len(page_text) + 2
+    
+    page_names = {page_num: {} for page_num in pages}
+    for start, end in iter_sentence_spans(text):
+        sentence = text[start:end]
+        if sentence in grant_names:
+            page_num = max(bisect_right(page_starts, start) - 1, 0)
+            if page_num in page_names:
+                page_names[page_num][sentence] = grant_names[sentence]
+    
+    page_cache.put_pages([
+        (keys[page_num], texts[page_num], table_rows[page_num], page_names[page_num])
+        for page_num in pages
+    ])
@@ -0,0 +1,317 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+class Job:
+    """
+    A unit of background work and its progress.
+    
+    The function running the job reports progress through update_progress()
+    and complete_stage(); readers take a consistent copy with to_dict().
+    """
+    
+    def __init__(self, job_id, store=None):
+        self.id = job_id
+        self.status = QUEUED
+        self.progress = {'stages_completed': []}
+        self.result = None
+        self.result_bytes = 0  # Size of the result as JSON, for memory bounds
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._store = store  # SharedJobStore other processes read this job from
+        self._lock = threading.Lock()
+    
+    def update_progress(self, **fields):
+        """Set progress counters such as pages_extracted or total_pages."""
+        with self._lock:
+            self.progress.update(fields)
+            self._save()
+    
+    def complete_stage(self, stage):
+        """Record that a named processing stage has finished."""
+        with self._lock:
+            self.progress['stages_completed'].append(stage)
+            self._save()
+    
+    def _save(self):
+        """Publish the job's state to the shared store; call with _lock held."""
+        if self._store is not None:
+            self._store.save(self)
+    
+    def to_dict(self):
+        """Return the job status as a JSON-serializable dictionary."""
+        with self._lock:
+            status = {
+                'job_id': self.id,
+                'status': self.status,
+                'progress': dict(self.progress, stages_completed=list(self.progress['stages_completed']))
+            }
+            if self.error:
+                status['error'] = self.error
+            return status
+
+class JobQueue:
+    """
+    Runs jobs on a local thread pool and keeps their status for polling.
+    
+    Finished jobs are retained for lookup until more than max_finished of
+    them accumulate, or their results (which hold each document's full text)
+    add up to more than max_result_bytes, after which the oldest are
+    forgotten. The newest finished job is always kept.
+    
+    With a SharedJobStore, every state change is also written to the store,
+    so a server running several worker processes can answer status polls
+    for a job in whichever process the poll lands.
+    """
+    
+    def __init__(self, max_workers, max_finished=1000, store=None, max_result_bytes=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._max_finished = max_finished
+        self._max_result_bytes = max_result_bytes
+        self._store = store
+        self._lock = threading.Lock()
+    
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue func(job, *args, **kwargs) to run in the background.
+        
+        The return value of func becomes the job result; an exception marks
+        the job as failed with its message as the error.
+        
+        Returns:
+            Job: The queued job
+        """
+        job = Job(uuid.uuid4().hex, self._store)
+        with job._lock:
+            job._save()
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+    
+    def get(self, job_id):
+        """Return the job with the given id, or None if it is unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self._store is not None:
+            # Submitted in another worker process
+            job = self._store.load(job_id)
+        return job
+    
+    def _run(self, job, func, args, kwargs):
+        with job._lock:
+            job.status = RUNNING
+            job._save()
+        try:
+            result = func(job, *args, **kwargs)
+        except Exception as e:
+            with job._lock:
+                job.status = FAILED
+                job.error = str(e)
+                job.finished_at = time.time()
+                job._save()
+            return
+        size = _result_size(result)
+        with job._lock:
+            job.result = result
+            job.result_bytes = size
+            job.status = DONE
+            job.finished_at = time.time()
+            job._save()
+        with self._lock:
+            self._prune()
+    
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_finished or max_result_bytes."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in (DONE, FAILED)]
+        excess = len(finished) - self._max_finished
+        total = sum(self._jobs[job_id].result_bytes for job_id in finished)
+        for job_id in finished[:-1]:
+            if excess <= 0 and (self._max_result_bytes is None or total <= self._max_result_bytes):
+                break
+            total -= self._jobs[job_id].result_bytes
+            excess -= 1
+            del self._jobs[job_id]
+
+def _result_size(result):
+    """Return the size of a job result as JSON, or 0 if it is not serializable."""
+    try:
+        return len(json.dumps(result))
+    except (TypeError, ValueError):
+        return 0
+
+_JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    progress TEXT NOT NULL,
+    result TEXT,
+    result_bytes INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+"""
+
+class SharedJobStore:
+    """
+    SQLite table of job states shared by the processes of a server.
+    
+    Jobs still run in the process that accepted them; the store only makes
+    their status and result readable from the others. Like GrantStore it
+    runs in WAL mode, so status polls never block a job saving its progress.
+    Finished jobs beyond the newest max_finished are deleted, as are the
+    oldest once their results add up to more than max_result_bytes.
+    """
+    
+    def __init__(self, db_path, max_finished=1000, max_result_bytes=None):
+        self.db_path = db_path
+        self.max_finished = max_finished
+        self.max_result_bytes = max_result_bytes
+        # sqlite3 connections cannot be shared across threads
+        self._local = threading.local()
+    
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_JOB_SCHEMA)
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(jobs)')]
+            if 'result_bytes' not in columns:
+                # Created by a version without result size bounds
+                conn.execute('ALTER TABLE jobs ADD COLUMN result_bytes INTEGER NOT NULL DEFAULT 0')
+            self._local.conn = conn
+        return conn
+    
+    def save(self, job):
+        """
+        Write the current state of a job.
+        
+        Args:
+            job (Job): The job; the caller holds its lock
+        """
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO jobs (id, status, progress, result, result_bytes, error, created_at, finished_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job.id, job.status, json.dumps(job.progress),
+             json.dumps(job.result) if job.result is not None else None,
+             job.result_bytes, job.error, job.created_at, job.finished_at)
+        )
+        if job.finished_at is not None:
+            conn.execute(
+                """
+                DELETE FROM jobs WHERE finished_at < (
+                    SELECT finished_at FROM jobs WHERE finished_at IS NOT NULL
+                    ORDER BY finished_at DESC LIMIT 1 OFFSET ?
+                )
+                """,
+                (self.max_finished - 1,)
+            )
+            if self.max_result_bytes is not None:
+                # Newest first: delete every job past the one that crosses the bound
+                conn.execute(
+                    """
+                    DELETE FROM jobs WHERE id IN (
+                        SELECT id FROM (
+                            SELECT id,
+                                   ROW_NUMBER() OVER (ORDER BY finished_at DESC) AS rank,
+                                   SUM(result_bytes) OVER (ORDER BY finished_at DESC) AS total
+                            FROM jobs WHERE finished_at IS NOT NULL
+                        ) WHERE rank > 1 AND total > ?
+                    )
+                    """,
+                    (self.max_result_bytes,)
+                )
+    
+    def load(self, job_id):
+        """
+        Read a snapshot of a job saved by any process.
+        
+        Args:
+            job_id (str): The job id
+            
+        Returns:
+            Job: A copy of the job's latest saved state, or None if unknown
+        """
+        row = self._connect().execute(
+            'SELECT status, progress, result, error, created_at, finished_at, result_bytes FROM jobs WHERE id = ?',
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = Job(job_id)
+        job.status = row[0]
+        job.progress = json.loads(row[1])
+        job.result = json.loads(row[2]) if row[2] is not None else None
+        job.error = row[3]
+        job.created_at = row[4]
+        job.finished_at = row[5]
+        job.result_bytes = row[6]
+        return job
+
+class BackgroundWriter:
+    """
+    Writes files on a background thread so requests do not wait on disk.
+    
+    Each file is written to a temporary name and renamed into place, so a
+    reader never sees a partial file. wait() blocks until a queued write to
+    a path has finished, for readers that need the file right away.
+    """
+    
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='writer')
+        self._pending = {}
+        self._lock = threading.Lock()
+    
+    def write(self, path, data):
+        """
+        Queue a write of data (bytes or str) to path, replacing any old file.
+        """
+        with self._lock:
+            future = self._executor.submit(self._write, path, data)
+            self._pending[path] = future
+        # Registered outside the lock: the callback runs at once if already done
+        future.add_done_callback(lambda done: self._forget(path, done))
+    
+    def _forget(self, path, future):
+        with self._lock:
+            if self._pending.get(path) is future:
+                del self._pending[path]
+    
+    def wait(self, path):
+        """Block until any queued write to path has finished."""
+        with self._lock:
+            future = self._pending.get(path)
+        if future is not None:
+            future.result()
+    
+    def _write(self, path, data):
+        tmp_path = path + '.tmp'
+        try:
+            if isinstance(data, str):
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+            else:
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing {path}: {e}")
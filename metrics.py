@@ -0,0 +1,130 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Upper bounds of the page count histogram buckets
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+# Upper bounds of the byte size histogram buckets
+BYTE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2, 64 * 1024 ** 2)
+
+class Histogram:
+    """
+    Cumulative histogram of observed values, split by one label.
+
+    Buckets follow the Prometheus convention: each bucket counts the
+    observations less than or equal to its upper bound, plus an implicit
+    +Inf bucket that counts every observation.
+    """
+
+    def __init__(self, name, help_text, label, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}  # Label value -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        """
+        Record one observation.
+
+        Args:
+            label_value (str): Value of the histogram's label, e.g. a stage name
+            value (float): The observed value
+        """
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        """Return the histogram in the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for label_value in sorted(series):
+            values = series[label_value]
+            label = f'{self.label}="{_escape_label(label_value)}"'
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{{{label},le="{_format_value(bound)}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {values[-1]}')
+            lines.append(f'{self.name}_sum{{{label}}} {_format_value(values[-2])}')
+            lines.append(f'{self.name}_count{{{label}}} {values[-1]}')
+        return '\n'.join(lines)
+
+def _format_value(value):
+    """Format a sample value or bucket bound exactly; %g would round it to 6 digits."""
+    return repr(float(value))
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+STAGE_SECONDS = Histogram(
+    'grant_parser_stage_seconds', 'Time spent in each processing stage.', 'stage', LATENCY_BUCKETS
+)
+DOCUMENT_PAGES = Histogram(
+    'grant_parser_document_pages', 'Pages per processed document.', 'source', PAGE_BUCKETS
+)
+DOCUMENT_BYTES = Histogram(
+    'grant_parser_document_bytes', 'Sizes of uploads and extracted texts, in bytes.', 'kind', BYTE_BUCKETS
+)
+HISTOGRAMS = (STAGE_SECONDS, DOCUMENT_PAGES, DOCUMENT_BYTES)
+
+# Stage breakdown of the request being profiled on this thread, if any
+_profile = threading.local()
+
+@contextmanager
+def timed(stage):
+    """
+    Time a block of code as a processing stage.
+
+    The duration is recorded in STAGE_SECONDS and, when the current thread
+    is inside profiling(), added to its stage breakdown.
+
+    Args:
+        stage (str): Name of the stage
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+def observe_stage(stage, seconds):
+    """
+    Record the duration of a stage that was timed by the caller.
+
+    Args:
+        stage (str): Name of the stage
+        seconds (float): Duration of the stage
+    """
+    STAGE_SECONDS.observe(stage, seconds)
+    stages = getattr(_profile, 'stages', None)
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+@contextmanager
+def profiling():
+    """
+    Collect a stage breakdown of the work done on this thread.
+
+    Yields:
+        dict: Stage name -> total seconds, filled in as stages finish
+    """
+    previous = getattr(_profile, 'stages', None)
+    _profile.stages = {}
+    try:
+        yield _profile.stages
+    finally:
+        _profile.stages = previous
+
+def render_metrics():
+    """Return every metric in the Prometheus text exposition format."""
+    return '\n'.join(histogram.render() for histogram in HISTOGRAMS) + '\n'
@@ -1,58 +1,593 @@
-import PyPDF2
-import sys
+import argparse
+import hashlib
+import io
+import multiprocessing
 import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
-def extract_text_from_pdf(pdf_path):
+from metrics import DOCUMENT_PAGES, timed
+
+# Documents with fewer pages than this are extracted serially even when a
+# process pool is requested; pool round-trips would cost more than they save.
+PARALLEL_MIN_PAGES = 8
+
+# Text fragments whose baselines are within this many points of each other
+# are treated as one table row by the layout pass
+ROW_TOLERANCE = 3.0
+
+# Guards creating and replacing the shared process pools below
+_pool_lock = threading.Lock()
+
+# Process pool shared by parallel extractions, created on first use
+_extraction_pool = None
+_extraction_pool_workers = 0
+
+# Pages with fewer non-blank characters of text than this are treated as
+# scanned, and their images are sent to OCR
+OCR_MIN_CHARS = 20
+
+# Tesseract language used for OCR
+OCR_LANGUAGE = 'eng'
+
+# Process pool for OCR, kept apart from the extraction pool so slow scanned
+# pages never hold up text extraction; created on first use
+_ocr_pool = None
+_ocr_pool_workers = 0
+
+# Whether pytesseract, Pillow and the tesseract binary are available; checked once
+_ocr_available = None
+
+def _open_pdf(pdf_path):
+    """
+    Open a PDF given either as a path or as its contents in memory.
+    
+    In-memory contents are wrapped in a BytesIO, which shares the buffer of
+    a bytes object instead of copying it, so uploads are extracted without a
+    temporary file (app.InMemoryUploadRequest keeps them out of one too).
+    
+    Args:
+        pdf_path (str or bytes): Path to the PDF file, or the file contents
+        
+    Returns:
+        file: A binary file object positioned at the start of the PDF
+    """
+    if isinstance(pdf_path, (bytes, bytearray)):
+        return io.BytesIO(pdf_path)
+    
+    # Check if file exists
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"The file {pdf_path} does not exist.")
+        
+    # Check if file is a PDF
+    if not pdf_path.lower().endswith('.pdf'):
+        raise ValueError("The file must be a PDF.")
+    
+    return open(pdf_path, 'rb')
+
+def _build_rows(fragments):
+    """
+    Group positioned text fragments into rows.
+    
+    Args:
+        fragments (list): (x, y, text) tuples in page coordinates
+        
+    Returns:
+        list: Row texts from the top of the page down, each row's fragments
+        joined left to right
+    """
+    rows = []
+    current = []
+    row_y = None
+    for x, y, text in sorted(fragments, key=lambda fragment: -fragment[1]):
+        if row_y is not None and row_y - y > ROW_TOLERANCE:
+            rows.append(current)
+            current = []
+        if not current:
+            row_y = y
+        current.append((x, text))
+    if current:
+        rows.append(current)
+    return [' '.join(' '.join(text.split()) for _, text in sorted(row, key=lambda cell: cell[0])) for row in rows]
+
+def _extract_page(page, layout):
+    """
+    Extract the text of a page, and its table rows if layout is set.
+    
+    The rows come from the same pass as the text: PyPDF2 reports each text
+    fragment with its text and current transformation matrices to a visitor,
+    which records where the fragment starts on the page.
+    
+    Returns:
+        str or tuple: The page text, or (text, rows) if layout is set
+    """
+    if not layout:
+        return page.extract_text()
+    
+    fragments = []
+    def visit(text, cm, tm, font_dict, font_size):
+        if text.strip():
+            # Text space origin mapped through the current transformation matrix
+            x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+            y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+            fragments.append((x, y, text))
+    
+    text = page.extract_text(visitor_text=visit)
+    return text, _build_rows(fragments)
+
+def _read_pdf(file):
+    """Open a PyPDF2 reader on a file object."""
+    # Imported on first use: it is the slowest import of the app, and
+    # callers such as cache hits and the CLIs never need it
+    import PyPDF2
+    return PyPDF2.PdfReader(file)
+
+def iter_pdf_pages(pdf_path, layout=False):
+    """
+    Yield the text of a PDF file one page at a time.
+    
+    Only one page of text is held in memory at once, so callers can start
+    analysing a document before the rest of it has been extracted.
+    
+    Args:
+        pdf_path (str or bytes): Path to the PDF file, or the file contents
+        layout (bool): Also rebuild each page's table rows from text positions
+        
+    Yields:
+        str: Extracted text of each page, in page order; (text, rows) tuples
+        if layout is set, rows being the page's row texts from top to bottom
+    """
+    # Open the PDF file
+    with _open_pdf(pdf_path) as file:
+        # Create a PDF reader object
+        pdf_reader = _read_pdf(file)
+        
+        # Extract text from each page
+        for page in pdf_reader.pages:
+            yield _extract_page(page, layout)
+
+def count_pdf_pages(pdf_path):
+    """
+    Count the pages of a PDF file without extracting any text.
+    
+    Args:
+        pdf_path (str or bytes): Path to the PDF file, or the file contents
+        
+    Returns:
+        int: Number of pages
+    """
+    with _open_pdf(pdf_path) as file:
+        return len(_read_pdf(file).pages)
+
+def _extract_page_range(pdf_path, start, stop, layout=False):
+    """Extract the text of pages [start, stop) of a PDF file (pool worker)."""
+    with _open_pdf(pdf_path) as file:
+        pdf_reader = _read_pdf(file)
+        return [_extract_page(pdf_reader.pages[page_num], layout) for page_num in range(start, stop)]
+
+def _extract_page_list(pdf_path, page_numbers, layout=False):
+    """Extract the text of the given pages of a PDF file (pool worker)."""
+    with _open_pdf(pdf_path) as file:
+        pdf_reader = _read_pdf(file)
+        return [_extract_page(pdf_reader.pages[page_num], layout) for page_num in page_numbers]
+
+def _hash_pdf_object(digest, obj, depth=0):
+    """Feed a PDF object into digest, following references and stream data."""
+    obj = obj.get_object() if hasattr(obj, 'get_object') else obj
+    if depth > 8:
+        # Deep enough for font and form resources; guards against cycles
+        digest.update(b'...')
+        return
+    if hasattr(obj, 'get_data'):  # A stream
+        digest.update(b'stream')
+        digest.update(obj.get_data())
+    if isinstance(obj, dict):
+        for key in sorted(obj):
+            if key in ('/Parent', '/P'):
+                continue
+            digest.update(key.encode('latin-1', 'replace'))
+            _hash_pdf_object(digest, obj[key], depth + 1)
+    elif isinstance(obj, list):
+        for item in obj:
+            _hash_pdf_object(digest, item, depth + 1)
+    else:
+        digest.update(repr(obj).encode('utf-8', 'replace'))
+
+def page_fingerprint(page):
+    """
+    Fingerprint what the extracted text and layout of a page depend on.
+    
+    The content stream, the page's fonts and form XObjects (including their
+    ToUnicode maps), and its box and rotation are hashed by value, so an
+    unchanged page in an amended document keeps its fingerprint even when
+    the objects are renumbered.
+    
+    Args:
+        page (PyPDF2.PageObject): The page
+        
+    Returns:
+        str: Hex digest of the page
+    """
+    digest = hashlib.sha256()
+    if '/Contents' in page:
+        _hash_pdf_object(digest, page['/Contents'])
+    resources = page.get('/Resources')
+    resources = resources.get_object() if resources is not None else {}
+    for key in ('/Font', '/XObject'):
+        digest.update(key.encode('latin-1'))
+        if key in resources:
+            _hash_pdf_object(digest, resources[key])
+    for key in ('/MediaBox', '/CropBox', '/Rotate'):
+        digest.update(repr(page.get(key)).encode('utf-8'))
+    return digest.hexdigest()
+
+def fingerprint_pdf_pages(pdf_path):
+    """
+    Fingerprint every page of a PDF file without extracting any text.
+    
+    Args:
+        pdf_path (str or bytes): Path to the PDF file, or the file contents
+        
+    Returns:
+        list: page_fingerprint of each page, in page order
+    """
+    with _open_pdf(pdf_path) as file:
+        return [page_fingerprint(page) for page in _read_pdf(file).pages]
+
+def extract_pdf_pages(pdf_path, page_numbers, workers=1, progress=None):
+    """
+    Extract the text and table rows of selected pages of a PDF file.
+    
+    Args:
+        pdf_path (str or bytes): Path to the PDF file, or the file contents
+        page_numbers (list): Zero-based numbers of the pages to extract
+        workers (int): Number of processes to extract pages with
+        progress (callable): Optional callback called with the number of
+            pages extracted so far, after each page (each chunk when parallel)
+        
+    Returns:
+        dict: Page number -> (text, rows), as iter_pdf_pages(layout=True) yields
+    """
+    page_numbers = list(page_numbers)
+    pages = {}
+    with timed('pdf_extract'):
+        if workers <= 1 or len(page_numbers) < PARALLEL_MIN_PAGES:
+            if page_numbers:
+                with _open_pdf(pdf_path) as file:
+                    pdf_reader = _read_pdf(file)
+                    for page_num in page_numbers:
+                        pages[page_num] = _extract_page(pdf_reader.pages[page_num], True)
+                        if progress:
+                            progress(len(pages))
+        else:
+            # Two chunks per worker, as in iter_pdf_pages_parallel
+            chunk_size = max(1, -(-len(page_numbers) // (workers * 2)))
+            chunks = [page_numbers[i:i + chunk_size] for i in range(0, len(page_numbers), chunk_size)]
+            pool = get_extraction_pool(workers)
+            futures = [pool.submit(_extract_page_list, pdf_path, chunk, True) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                pages.update(zip(chunk, future.result()))
+                if progress:
+                    progress(len(pages))
+    return pages
+
+def get_extraction_pool(workers):
+    """
+    Return the shared extraction process pool, resizing or replacing it if needed.
+    
+    Args:
+        workers (int): Number of worker processes
+        
+    Returns:
+        ProcessPoolExecutor: The shared pool
+    """
+    global _extraction_pool, _extraction_pool_workers
+    with _pool_lock:
+        if _needs_new_pool(_extraction_pool, _extraction_pool_workers, workers):
+            if _extraction_pool is not None:
+                _extraction_pool.shutdown(wait=False)
+            # Spawn rather than fork so the pool is safe to start from a threaded server
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _extraction_pool_workers = workers
+        return _extraction_pool
+
+def _needs_new_pool(pool, pool_workers, workers):
+    """
+    Whether a shared pool has to be (re)created before it is handed out.
+    
+    A pool whose worker died (killed, out of memory) is broken for good:
+    every later submit raises BrokenProcessPool, so it is replaced.
+    
+    Args:
+        pool (ProcessPoolExecutor): The current pool, or None
+        pool_workers (int): Number of workers the current pool was created with
+        workers (int): Number of workers asked for
+        
+    Returns:
+        bool: True if a new pool is needed
+    """
+    return pool is None or pool_workers != workers or getattr(pool, '_broken', False)
+
+def ocr_available():
+    """
+    Check whether OCR can run: pytesseract, Pillow and the tesseract binary.
+    
+    Returns:
+        bool: True if scanned pages can be OCRed
+    """
+    global _ocr_available
+    if _ocr_available is None:
+        try:
+            import pytesseract
+            import PIL.Image  # noqa: F401
+            _ocr_available = shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+        except ImportError:
+            _ocr_available = False
+        if not _ocr_available:
+            print("OCR is unavailable: install Tesseract, pytesseract and Pillow to read scanned pages")
+    return _ocr_available
+
+def needs_ocr(text):
+    """Whether a page's extracted text is too short for it to have a text layer."""
+    return len(text.strip()) < OCR_MIN_CHARS
+
+def ocr_rows(text):
+    """Split OCR text into the page's row texts, as the layout pass would."""
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+def _page_images(page):
+    """Return the encoded images drawn on a page; unreadable images are skipped."""
+    try:
+        return [image.data for image in page.images]
+    except Exception as e:
+        print(f"Could not read page images: {str(e)}")
+        return []
+
+def _ocr_images(images, language):
+    """OCR the encoded images of one page and join their text (pool worker)."""
+    import pytesseract
+    from PIL import Image
+    texts = []
+    for data in images:
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                texts.append(pytesseract.image_to_string(image, lang=language).strip())
+        except Exception as e:
+            print(f"OCR failed on an image: {str(e)}")
+    return "\n".join(text for text in texts if text)
+
+def get_ocr_pool(workers):
+    """
+    Return the shared OCR process pool, resizing or replacing it if needed.
+    
+    Args:
+        workers (int): Number of worker processes
+        
+    Returns:
+        ProcessPoolExecutor: The shared pool
+    """
+    global _ocr_pool, _ocr_pool_workers
+    with _pool_lock:
+        if _needs_new_pool(_ocr_pool, _ocr_pool_workers, workers):
+            if _ocr_pool is not None:
+                _ocr_pool.shutdown(wait=False)
+            _ocr_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _ocr_pool_workers = workers
+        return _ocr_pool
+
+class PageOcr:
+    """
+    OCR fallback for the pages of a PDF that have no text layer.
+    
+    Only the pages passed to recognize are read, so a mostly digital
+    document with a few scanned pages costs a few OCR calls. Results are
+    cached by page_fingerprint and language, so a scanned page is OCRed
+    once however many documents or versions it appears in.
+    
+    Args:
+        workers (int): Number of OCR processes; 1 OCRs in the calling process
+        cache (OcrCache): Optional cache of per-page OCR text
+        language (str): Tesseract language
+    """
+    
+    def __init__(self, workers=1, cache=None, language=OCR_LANGUAGE):
+        self.workers = workers
+        self.cache = cache
+        self.language = language
+    
+    def recognize(self, pdf_path, page_numbers):
+        """
+        OCR the given pages of a PDF file.
+        
+        Args:
+            pdf_path (str or bytes): Path to the PDF file, or the file contents
+            page_numbers (list): Zero-based numbers of the pages to OCR
+            
+        Returns:
+            dict: Page number -> OCR text, for the pages whose images held
+            any text; empty if OCR is unavailable
+        """
+        if not page_numbers or not ocr_available():
+            return {}
+        
+        texts = {}
+        pending = {}
+        try:
+            with timed('ocr'):
+                with _open_pdf(pdf_path) as file:
+                    pdf_reader = _read_pdf(file)
+                    for page_num in page_numbers:
+                        page = pdf_reader.pages[page_num]
+                        key = None
+                        if self.cache is not None:
+                            key = self.cache.key_for_page(page_fingerprint(page), self.language)
+                            text = self.cache.get_text(key)
+                            if text is not None:
+                                if text:
+                                    texts[page_num] = text
+                                continue
+                        images = _page_images(page)
+                        if images:
+                            pending[page_num] = (key, images)
+                
+                if self.workers > 1 and len(pending) > 1:
+                    pool = get_ocr_pool(self.workers)
+                    futures = {
+                        page_num: pool.submit(_ocr_images, images, self.language)
+                        for page_num, (_, images) in pending.items()
+                    }
+                    results = {page_num: future.result() for page_num, future in futures.items()}
+                else:
+                    results = {
+                        page_num: _ocr_images(images, self.language)
+                        for page_num, (_, images) in pending.items()
+                    }
+                
+                for page_num, text in results.items():
+                    if text:
+                        texts[page_num] = text
+                    # Images without text are cached too, so they are not OCRed again
+                    key = pending[page_num][0]
+                    if key is not None:
+                        self.cache.put_text(key, text)
+        except Exception as e:
+            # Pages that could not be OCRed keep their extracted text
+            print(f"An error occurred during OCR: {str(e)}")
+        DOCUMENT_PAGES.observe('ocr', len(texts))
+        return texts
+
+def iter_pdf_pages_parallel(pdf_path, workers, layout=False):
+    """
+    Yield the text of a PDF file page by page, extracting in parallel.
+    
+    Pages are split into contiguous ranges that are extracted by a process
+    pool; the ranges are yielded back in page order as they complete.
+    
+    In-memory contents are sent to each worker along with its page range,
+    so for those the pool only pays off on large documents.
+    
+    Args:
+        pdf_path (str or bytes): Path to the PDF file, or the file contents
+        workers (int): Number of worker processes
+        layout (bool): Also rebuild each page's table rows, as iter_pdf_pages does
+        
+    Yields:
+        str: Extracted text of each page, in page order; (text, rows) tuples
+        if layout is set
+    """
+    num_pages = count_pdf_pages(pdf_path)
+    
+    if workers <= 1 or num_pages < PARALLEL_MIN_PAGES:
+        yield from iter_pdf_pages(pdf_path, layout)
+        return
+    
+    # Two ranges per worker evens out pages that are slower to extract
+    range_size = max(1, -(-num_pages // (workers * 2)))
+    pool = get_extraction_pool(workers)
+    futures = [
+        pool.submit(_extract_page_range, pdf_path, start, min(start + range_size, num_pages), layout)
+        for start in range(0, num_pages, range_size)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        # A caller that stops early does not wait for ranges it will never read
+        for future in futures:
+            future.cancel()
+
+def extract_text_from_pdf(pdf_path, workers=1, progress=None, ocr=None):
     """
     Extract text from a PDF file.
     
     Args:
-        pdf_path (str): Path to the PDF file
+        pdf_path (str or bytes): Path to the PDF file, or the file contents
+        workers (int): Number of processes to extract pages with; 1 extracts
+            in the calling process
+        progress (callable): Optional callback called with the number of
+            pages extracted so far after each page
+        ocr (PageOcr): Optional OCR fallback for pages without a text layer
         
     Returns:
         str: Extracted text from the PDF
     """
+    return _extract_document(pdf_path, workers, progress, layout=False, ocr=ocr)[0]
+
+def extract_pdf_document(pdf_path, workers=1, progress=None, ocr=None):
+    """
+    Extract the text of a PDF file together with its table rows.
+    
+    Takes the same arguments as extract_text_from_pdf. The rows are rebuilt
+    from text positions in the same pass as the text, for layout-aware
+    analysis such as grant_identifier.extract_financial_fields_from_rows.
+    
+    Returns:
+        tuple: (text, page_rows) where page_rows holds each page's row
+        texts; (None, None) if extraction failed
+    """
+    return _extract_document(pdf_path, workers, progress, layout=True, ocr=ocr)
+
+def _extract_document(pdf_path, workers, progress, layout, ocr=None):
+    """Extract text, and page rows if layout is set; see extract_pdf_document."""
     try:
-        # Check if file exists
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"The file {pdf_path} does not exist.")
-            
-        # Check if file is a PDF
-        if not pdf_path.lower().endswith('.pdf'):
-            raise ValueError("The file must be a PDF.")
-            
-        # Open the PDF file
-        with open(pdf_path, 'rb') as file:
-            # Create a PDF reader object
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            # Get the number of pages
-            num_pages = len(pdf_reader.pages)
+        with timed('pdf_extract'):
+            if workers > 1:
+                pages = iter_pdf_pages_parallel(pdf_path, workers, layout)
+            else:
+                pages = iter_pdf_pages(pdf_path, layout)
             
-            # Extract text from each page
-            text = ""
-            for page_num in range(num_pages):
-                # Get the page
-                page = pdf_reader.pages[page_num]
-                # Extract text from the page
-                text += page.extract_text() + "\n\n"
-                
-            return text.strip()
+            texts = []
+            page_rows = []
+            for page in pages:
+                if layout:
+                    page, rows = page
+                    page_rows.append(rows)
+                texts.append(page)
+                if progress:
+                    progress(len(texts))
+        
+        # Scanned pages have no text layer; read them with OCR instead
+        if ocr is not None:
+            scanned = [page_num for page_num, page in enumerate(texts) if needs_ocr(page)]
+            for page_num, page in ocr.recognize(pdf_path, scanned).items():
+                texts[page_num] = page
+                if layout:
+                    page_rows[page_num] = ocr_rows(page)
+        DOCUMENT_PAGES.observe('pdf', len(texts))
+        # Join once instead of growing a string page by page
+        return "\n\n".join(texts).strip(), (page_rows if layout else None)
             
     except Exception as e:
         print(f"An error occurred: {str(e)}")
-        return None
+        return None, None
 
 def main():
-    # Check if PDF path is provided as command line argument
-    if len(sys.argv) != 2:
-        print("Usage: python pdf_extractor.py <path_to_pdf>")
-        sys.exit(1)
-        
-    pdf_path = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        usage="python pdf_extractor.py <path_to_pdf> [--workers N] [--ocr]",
+        description="Extract text from a PDF file."
+    )
+    parser.add_argument('pdf_path', help="Path to the PDF file")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of processes used to extract pages (default: 1)")
+    parser.add_argument('--ocr', action='store_true',
+                        help="OCR pages that have no text layer (needs Tesseract)")
+    args = parser.parse_args()
+    
+    pdf_path = args.pdf_path
     
     # Extract text from PDF
-    extracted_text = extract_text_from_pdf(pdf_path)
+    extracted_text = extract_text_from_pdf(
+        pdf_path,
+        workers=args.workers,
+        ocr=PageOcr(workers=args.workers) if args.ocr else None
+    )
     
     if extracted_text:
         print("\nExtracted Text:")
@@ -0,0 +1,216 @@
+import argparse
+import json
+import math
+import re
+import sys
+from datetime import date
+
+from grant_identifier import FINANCIAL_PATTERNS, normalize_grant_name
+
+# Dates are read as written by serialize_result
+ISO_DATE_REGEX = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# Years a grant period may fall in; the yearly totals hold one column per
+# year between the earliest start and the latest end, so a date such as
+# 0001-01-01 would make that table thousands of columns wide
+MIN_YEAR = 1900
+MAX_YEAR = 2100
+
+def validate_result(result):
+    """
+    Check that a client-supplied result has the shape aggregate_results reads.
+
+    Args:
+        result: A result as returned by serialize_result
+
+    Raises:
+        ValueError: If the result, its financial fields, dates or grants
+            are malformed
+    """
+    if not isinstance(result, dict):
+        raise ValueError("result must be an object")
+
+    financial = result.get('financial') or {}
+    if not isinstance(financial, dict):
+        raise ValueError("financial must be an object")
+    for category, field in financial.items():
+        if field is None:
+            continue
+        if not isinstance(field, dict):
+            raise ValueError(f"financial.{category} must be an object")
+        value = field.get('value')
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))
+                                  or not math.isfinite(value)):
+            raise ValueError(f"financial.{category}.value must be a finite number")
+
+    dates = result.get('dates') or {}
+    if not isinstance(dates, dict):
+        raise ValueError("dates must be an object")
+    for key in ('start_date', 'end_date'):
+        value = dates.get(key)
+        if value is None:
+            continue
+        try:
+            if not isinstance(value, str) or not ISO_DATE_REGEX.fullmatch(value):
+                raise ValueError
+            year = date.fromisoformat(value).year
+        except ValueError:
+            raise ValueError(f"dates.{key} must be a YYYY-MM-DD date") from None
+        if not MIN_YEAR <= year <= MAX_YEAR:
+            raise ValueError(f"dates.{key} must be between {MIN_YEAR} and {MAX_YEAR}")
+
+    grants = result.get('grants') or []
+    if not isinstance(grants, list):
+        raise ValueError("grants must be a list")
+    for grant in grants:
+        if not isinstance(grant, dict) or not isinstance(grant.get('name'), str):
+            raise ValueError("each grant must be an object with a name")
+        confidence = grant.get('confidence', 0.0)
+        if isinstance(confidence, bool) or not isinstance(confidence, (int, float)):
+            raise ValueError("grant confidence must be a number")
+
+def aggregate_results(results, document_ids=None):
+    """
+    Aggregate the analysis results of many documents into a portfolio report.
+
+    Each document's financial fields are spread over the calendar years of
+    its period in proportion to the days that fall in each year, and then
+    summed per year and category; documents without a full period are
+    reported as unallocated. Grants are merged across documents by
+    normalized name. The sums run as NumPy array operations over a
+    documents x categories matrix, so thousands of awards take milliseconds.
+
+    Args:
+        results (list): JSON-ready results, as returned by serialize_result
+        document_ids (list): Identifier of each result (default: its index)
+
+    Returns:
+        dict: The portfolio report
+    """
+    # Imported here so importing this module (app.py does) stays cheap
+    import numpy as np
+
+    if document_ids is None:
+        document_ids = list(range(len(results)))
+    categories = list(FINANCIAL_PATTERNS)
+
+    # Documents x categories; missing fields stay 0 and are masked out of counts
+    values = np.zeros((len(results), len(categories)))
+    reported = np.zeros((len(results), len(categories)), dtype=bool)
+    starts = np.full(len(results), np.datetime64('NaT'), dtype='datetime64[D]')
+    ends = np.full(len(results), np.datetime64('NaT'), dtype='datetime64[D]')
+    for row, result in enumerate(results):
+        financial = result.get('financial') or {}
+        for column, category in enumerate(categories):
+            field = financial.get(category)
+            if field and field.get('value') is not None:
+                values[row, column] = field['value']
+                reported[row, column] = True
+        dates = result.get('dates') or {}
+        if dates.get('start_date') and dates.get('end_date'):
+            starts[row] = np.datetime64(dates['start_date'], 'D')
+            ends[row] = np.datetime64(dates['end_date'], 'D')
+
+    dated = ~np.isnat(starts) & ~np.isnat(ends) & (ends >= starts)
+    report = {
+        'documents': len(results),
+        'categories': categories,
+        'totals': dict(zip(categories, values.sum(axis=0).tolist())),
+        'documents_reporting': dict(zip(categories, reported.sum(axis=0).tolist())),
+        'yearly': _yearly_totals(values[dated], starts[dated], ends[dated], categories),
+        'unallocated': dict(zip(categories, values[~dated].sum(axis=0).tolist())),
+        'grants': _merge_grants(results, document_ids)
+    }
+    return report
+
+def _yearly_totals(values, starts, ends, categories):
+    """Spread each dated document's values over calendar years by day count."""
+    import numpy as np
+    if len(values) == 0:
+        return []
+    first_year = starts.astype('datetime64[Y]').astype(int).min() + 1970
+    last_year = ends.astype('datetime64[Y]').astype(int).max() + 1970
+    years = np.arange(first_year, last_year + 1)
+    year_starts = (years - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+    year_ends = (years - 1970 + 1).astype('datetime64[Y]').astype('datetime64[D]') - np.timedelta64(1, 'D')
+
+    # Documents x years: days of each document's period inside each year
+    overlap = (
+        np.minimum(ends[:, None], year_ends[None, :]) -
+        np.maximum(starts[:, None], year_starts[None, :])
+    ).astype(int) + 1
+    overlap = np.clip(overlap, 0, None)
+    shares = overlap / overlap.sum(axis=1, keepdims=True)
+    yearly = shares.T @ values  # Years x categories
+
+    periods = []
+    for index, year in enumerate(years.tolist()):
+        active = overlap[:, index] > 0
+        if not active.any():
+            continue
+        periods.append({
+            'year': year,
+            'start': str(max(year_starts[index], starts[active].min())),
+            'end': str(min(year_ends[index], ends[active].max())),
+            'documents': int(active.sum()),
+            'totals': dict(zip(categories, yearly[index].tolist()))
+        })
+    return periods
+
+def _merge_grants(results, document_ids):
+    """Merge grant candidates across documents by normalized name."""
+    merged = {}
+    for document_id, result in zip(document_ids, results):
+        for grant in result.get('grants') or []:
+            key = normalize_grant_name(grant['name'])
+            if not key:
+                continue
+            entry = merged.get(key)
+            if entry is None:
+                entry = merged[key] = {
+                    'name': grant['name'],
+                    'confidence': grant.get('confidence', 0.0),
+                    'documents': []
+                }
+            elif grant.get('confidence', 0.0) > entry['confidence']:
+                # Keep the spelling of the most confident candidate
+                entry['name'] = grant['name']
+                entry['confidence'] = grant['confidence']
+            if document_id not in entry['documents']:
+                entry['documents'].append(document_id)
+    return sorted(merged.values(), key=lambda x: (-len(x['documents']), -x['confidence']))
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate bulk_ingest results into a portfolio report.")
+    parser.add_argument('results', help="JSON Lines file written by bulk_ingest.py")
+    parser.add_argument('--output', help="Write the report to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    document_ids = []
+    with open(args.results, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict) or not record.get('result'):
+                continue
+            try:
+                validate_result(record['result'])
+            except ValueError as e:
+                # Not on stdout, which may carry the report
+                print(f"Skipping {record.get('path')}: {e}", file=sys.stderr)
+                continue
+            results.append(record['result'])
+            document_ids.append(record['path'])
+
+    report = json.dumps(aggregate_results(results, document_ids), indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+    else:
+        print(report)
+
+if __name__ == "__main__":
+    main()
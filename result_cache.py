@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from grant_identifier import ANALYZER_VERSION
+
+# Eviction brings a full cache down to this fraction of max_bytes, so it is
+# rescanned once per tenth of its size written rather than on every write
+EVICT_TO_FRACTION = 0.9
+
+class ResultCache:
+    """
+    Content-addressed, size-bounded disk cache for upload results.
+    
+    Entries are keyed by the SHA-256 of the uploaded bytes together with
+    ANALYZER_VERSION, so a change to the analyzer never serves stale results,
+    and optionally with the generation of the saved grants.
+    Each entry stores the extracted text and the JSON-ready analysis result.
+    When the cache grows past max_bytes the least recently used entries
+    (by file modification time, refreshed on every hit) are evicted.
+    
+    The size of the cache is tracked in memory from one directory scan plus
+    the entries written since, so writes only rescan the directory once the
+    estimate passes max_bytes. Entries written by other processes are picked
+    up by that rescan.
+    """
+    
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None  # Estimated bytes on disk; None until the first scan
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def key_for(self, data, grant_generation=None):
+        """
+        Build the cache key for uploaded file contents.
+        
+        Args:
+            data (bytes): The uploaded file contents
+            grant_generation (int): Optional generation of the saved grants
+                the result depends on (KnownGrantIndex.generation), so a
+                result cached before a new grant name was saved is not served after
+            
+        Returns:
+            str: Hex digest identifying the contents and analyzer version
+        """
+        digest = hashlib.sha256(data)
+        digest.update(b'\0' + ANALYZER_VERSION.encode('utf-8'))
+        if grant_generation is not None:
+            digest.update(b'\0' + str(grant_generation).encode('ascii'))
+        return digest.hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+    
+    def get(self, key):
+        """
+        Look up a cached entry.
+        
+        Args:
+            key (str): Key from key_for
+            
+        Returns:
+            dict: {'text': ..., 'result': ...} or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Error reading cache entry {key}: {e}")
+            return None
+        
+        try:
+            # Mark the entry as recently used
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+    
+    def put(self, key, text, result):
+        """
+        Store an entry and evict old ones if the cache is over its size limit.
+        
+        Args:
+            key (str): Key from key_for
+            text (str): Extracted document text
+            result (dict): JSON-serializable analysis result
+        """
+        self._put_entry(key, {'text': text, 'result': result})
+    
+    def _put_entry(self, key, entry, evict=True):
+        """Write an entry atomically, then evict old ones if needed (unless evict is False)."""
+        path = self._path(key)
+        try:
+            # Write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            size = os.path.getsize(tmp_path)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Error writing cache entry {key}: {e}")
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size += size - replaced
+        if evict:
+            self._evict()
+    
+    def _evict(self):
+        """Delete least recently used entries once the cache outgrows max_bytes."""
+        with self._lock:
+            if self._size is not None and self._size <= self.max_bytes:
+                return
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= self.max_bytes * EVICT_TO_FRACTION:
+                        break
+                    try:
+                        os.remove(path)
+                        total -= size
+                    except OSError:
+                        continue
+            self._size = total
+
+class PageCache(ResultCache):
+    """
+    Disk cache of per-page partial results, keyed by page fingerprint.
+    
+    When a corrected or amended version of a document is uploaded, only the
+    pages whose fingerprint (pdf_extractor.page_fingerprint) changed have to
+    be extracted again. Each entry holds a page's text and table rows, and
+    the grant names already extracted from the sentences that start on it.
+    Entries are bounded and evicted like ResultCache entries.
+    """
+    
+    def key_for_page(self, fingerprint):
+        """
+        Build the cache key for a page.
+        
+        Args:
+            fingerprint (str): The page's fingerprint
+            
+        Returns:
+            str: Hex digest identifying the page and analyzer version
+        """
+        return self.key_for(fingerprint.encode('ascii'))
+    
+    def put_page(self, key, text, rows, grant_names):
+        """
+        Store a page's partial results.
+        
+        Args:
+            key (str): Key from key_for_page
+            text (str): Extracted page text
+            rows (list): The page's table row texts
+            grant_names (dict): Sentence -> grant name extracted from it
+        """
+        self._put_entry(key, {'text': text, 'rows': rows, 'grant_names': grant_names})
+    
+    def put_pages(self, pages):
+        """
+        Store the partial results of many pages, evicting once at the end.
+        
+        Args:
+            pages (list): (key, text, rows, grant_names) tuples, as taken by put_page
+        """
+        for key, text, rows, grant_names in pages:
+            self._put_entry(key, {'text': text, 'rows': rows, 'grant_names': grant_names}, evict=False)
+        self._evict()
+
+class OcrCache(ResultCache):
+    """
+    Disk cache of OCR text per page, keyed by page fingerprint and language.
+    
+    OCR is by far the slowest way to read a page, so a scanned page (such as
+    a signature page shared by many agreements) is OCRed once. Keys do not
+    include ANALYZER_VERSION: OCR text does not depend on the analyzer.
+    Entries are bounded and evicted like ResultCache entries.
+    """
+    
+    def key_for_page(self, fingerprint, language):
+        """
+        Build the cache key for a page's OCR text.
+        
+        Args:
+            fingerprint (str): The page's fingerprint
+            language (str): Tesseract language the page is read with
+            
+        Returns:
+            str: Hex digest identifying the page and language
+        """
+        return hashlib.sha256(f'ocr:{language}:{fingerprint}'.encode('utf-8')).hexdigest()
+    
+    def get_text(self, key):
+        """
+        Look up a page's OCR text.
+        
+        Args:
+            key (str): Key from key_for_page
+            
+        Returns:
+            str: The cached text, possibly empty, or None on a miss
+        """
+        entry = self.get(key)
+        return entry['text'] if entry else None
+    
+    def put_text(self, key, text):
+        """
+        Store a page's OCR text.
+        
+        Args:
+            key (str): Key from key_for_page
+            text (str): OCR text of the page
+        """
+        self._put_entry(key, {'text': text})
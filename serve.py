@@ -0,0 +1,71 @@
+"""
+Production entry point: serve the app with gunicorn.
+
+The app is imported, and the analyzer's patterns compiled, once in the
+master; the forked workers share that state instead of each rebuilding it.
+Importing the app opens no connections or pools, so each worker still
+opens its own SQLite connections and PDF extraction pool on first use.
+State the workers must agree on lives on disk: saved
+grants in GRANT_DB_PATH, upload jobs in JOB_DB_PATH, and the result and
+page caches in RESULT_CACHE_DIR. A status poll can therefore land on any
+worker, and a grant saved through one worker is recognized by all of them
+on their next analysis.
+
+Usage: python serve.py [--bind 0.0.0.0:8000] [--workers N] [--threads N]
+           [--timeout S] [--job-db jobs.sqlite3]
+"""
+import argparse
+import multiprocessing
+import os
+
+from gunicorn.app.base import BaseApplication
+
+class GrantParserServer(BaseApplication):
+    """Gunicorn application that serves app.app."""
+    
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+    
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+    
+    def load(self):
+        # With preload_app this runs in the master, before the workers fork
+        from app import app
+        from grant_identifier import precompile_analyzer
+        import PyPDF2  # noqa: F401 - imported lazily otherwise
+        precompile_analyzer()
+        return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the grant parser with gunicorn.")
+    parser.add_argument('--bind', default=os.environ.get('BIND', '0.0.0.0:8000'),
+                        help="Address to listen on (default: 0.0.0.0:8000)")
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ.get('WEB_WORKERS', str(min(multiprocessing.cpu_count(), 4)))),
+                        help="Worker processes (default: CPU count, at most 4)")
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', '8')),
+                        help="Request threads per worker (default: 8)")
+    parser.add_argument('--timeout', type=int, default=120,
+                        help="Seconds before a silent worker is restarted (default: 120)")
+    parser.add_argument('--job-db', default=os.environ.get('JOB_DB_PATH', 'jobs.sqlite3'),
+                        help="SQLite file shared by the workers for job status (default: jobs.sqlite3)")
+    args = parser.parse_args()
+    
+    # Read by app.py when the master imports it
+    os.environ['JOB_DB_PATH'] = args.job_db
+    
+    GrantParserServer({
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'timeout': args.timeout,
+        'preload_app': True,
+        'accesslog': '-'
+    }).run()
+
+if __name__ == "__main__":
+    main()